@@ -1,13 +1,32 @@
-from flask import Flask, request, jsonify, session
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, request, jsonify, session, g, has_request_context
+from flask.globals import request_ctx
 import sqlite3
 from datetime import datetime
 import os
 import random
-import time
 import logging
 import json
+import hashlib
+import secrets
+import math
+import queue
+import threading
+from collections import OrderedDict
 from logging.handlers import RotatingFileHandler
 from functools import wraps
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+from catalog_snapshot import CatalogSnapshot, build_snapshot
+from product_io import FORMATS as PRODUCT_IO_FORMATS, import_products, export_products
+from order_shards import DEFAULT_TIMEOUT as SHARD_TIMEOUT, ShardedOrderStore
+from order_export import FORMATS as ORDER_EXPORT_FORMATS, MIN_DATE, MAX_DATE, parse_date_bound, export_orders
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from schema import (SCHEMA_VERSION, ORDER_ITEM_SNAPSHOT_COLUMNS, add_missing_columns, backfill_order_item_snapshots,
+                    create_schema)
+from models import Product, Order, OrderItem, encode_order, encode_products, encode_orders, encode_order_items
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'
@@ -18,16 +37,121 @@ SIMULATE_SLOW_RESPONSE = False
 SIMULATE_RANDOM_ERRORS = False
 SIMULATE_NULL_POINTER = False
 
+# Idempotency key store settings
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60  # seconds a stored response can be replayed
+IDEMPOTENCY_MAX_KEYS = 10000  # oldest keys are evicted beyond this
+IDEMPOTENCY_WAIT_TIMEOUT = 10  # seconds a duplicate waits for the in-flight request
+IDEMPOTENCY_IN_FLIGHT_TTL = 60  # seconds before an unfinished claim is considered abandoned
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+IDEMPOTENCY_STORE_GRACE = 1  # seconds a finished request may overrun its deadline to record the response
+
+# Write-behind order ingestion (group commit), opt-in
+ORDER_GROUP_COMMIT = os.environ.get('ORDER_GROUP_COMMIT', '0') == '1'
+ORDER_BATCH_MAX_SIZE = int(os.environ.get('ORDER_BATCH_MAX_SIZE', '64'))
+ORDER_BATCH_MAX_WAIT = float(os.environ.get('ORDER_BATCH_MAX_WAIT_MS', '5')) / 1000
+ORDER_COMMIT_TIMEOUT = 30  # seconds a request waits for its batch to become durable
+
+# Shared mmap'd catalog snapshot used for product lookups
+CATALOG_SNAPSHOT = os.environ.get('CATALOG_SNAPSHOT', '1') == '1'
+CATALOG_SNAPSHOT_PATH = os.environ.get('CATALOG_SNAPSHOT_PATH', 'catalog.snapshot')
+catalog = CatalogSnapshot(CATALOG_SNAPSHOT_PATH)
+
+# Batch price/stock lookups
+AVAILABILITY_MAX_IDS = int(os.environ.get('AVAILABILITY_MAX_IDS', '5000'))
+
+# Bulk cart mutations
+CART_BULK_MAX_ITEMS = int(os.environ.get('CART_BULK_MAX_ITEMS', '500'))
+CART_BULK_ACTIONS = ('add', 'set', 'remove')
+
+# Batch request endpoint
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '20'))
+
+# Order archival (hot/cold partitioning), background job is opt-in
+ORDER_ARCHIVE = os.environ.get('ORDER_ARCHIVE', '0') == '1'
+ARCHIVE_DB_PATH = os.environ.get('ARCHIVE_DB_PATH', 'ecommerce_archive.db')
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', '90'))
+ORDER_ARCHIVE_BATCH_SIZE = int(os.environ.get('ORDER_ARCHIVE_BATCH_SIZE', '500'))
+ORDER_ARCHIVE_INTERVAL = float(os.environ.get('ORDER_ARCHIVE_INTERVAL', '3600'))
+
+# Sharded order storage, 0 keeps orders in ecommerce.db
+ORDER_SHARDS = int(os.environ.get('ORDER_SHARDS', '0'))
+ORDER_SHARD_DIR = os.environ.get('ORDER_SHARD_DIR', 'shards')
+ORDER_SHARD_KEY = os.environ.get('ORDER_SHARD_KEY', 'customer')
+order_shards = ShardedOrderStore(ORDER_SHARD_DIR, ORDER_SHARDS, ORDER_SHARD_KEY) if ORDER_SHARDS else None
+
+# Serialized GET /api/orders/<id> responses, orders never change once written
+ORDER_CACHE_MAX_BYTES = int(os.environ.get('ORDER_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+ORDER_CACHE_CONTROL = 'private, max-age=31536000, immutable'  # orders carry customer details
+
+# Import and startup timings, reported by /api/health
+STARTUP_TIMINGS = {}
+
+# Background readiness probe
+HEALTH_PROBE_INTERVAL = float(os.environ.get('HEALTH_PROBE_INTERVAL', '5'))
+HEALTH_MAX_ORDER_QUEUE = int(os.environ.get('HEALTH_MAX_ORDER_QUEUE', '1024'))
+
+# Per-request time budget, bounds SQLite's busy timeout and aborts long queries
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE_MS', '10000')) / 1000
+DB_PROGRESS_HANDLER_OPS = 1000  # SQLite VM instructions between deadline checks
+
+# Database circuit breaker
+DB_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('DB_BREAKER_FAILURE_THRESHOLD', '5'))
+DB_BREAKER_RESET_TIMEOUT = float(os.environ.get('DB_BREAKER_RESET_TIMEOUT', '30'))
+db_breaker = CircuitBreaker('database', DB_BREAKER_FAILURE_THRESHOLD, DB_BREAKER_RESET_TIMEOUT)
+
+class LazyHandler(logging.Handler):
+    """Handler that builds the real handler on the first record it emits.
+
+    Keeps imports cheap: log directories and files are only created once
+    something is actually logged.
+    """
+
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+        self._handler = None
+
+    def _get_handler(self):
+        if self._handler is None:
+            self.acquire()
+            try:
+                if self._handler is None:
+                    self._handler = self._factory()
+            finally:
+                self.release()
+        return self._handler
+
+    def emit(self, record):
+        try:
+            self._get_handler().handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
+
 # Configure logging
 def setup_logging():
     """Setup comprehensive logging configuration"""
-    # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
-    
     # Configure logging format
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
+    def rotating_file(filename):
+        def factory():
+            # Create logs directory if it doesn't exist
+            if not os.path.exists('logs'):
+                os.makedirs('logs', exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join('logs', filename),
+                maxBytes=1024 * 1024,  # 1MB
+                backupCount=5
+            )
+            handler.setFormatter(logging.Formatter(log_format))
+            return handler
+        return LazyHandler(factory)
+    
     # Configure root logger
     logging.basicConfig(
         level=logging.INFO,
@@ -36,17 +160,9 @@ def setup_logging():
             # Console handler
             logging.StreamHandler(),
             # File handler with rotation
-            RotatingFileHandler(
-                'logs/app.log',
-                maxBytes=1024 * 1024,  # 1MB
-                backupCount=5
-            ),
+            rotating_file('app.log'),
             # Error file handler
-            RotatingFileHandler(
-                'logs/error.log',
-                maxBytes=1024 * 1024,  # 1MB
-                backupCount=5
-            )
+            rotating_file('error.log')
         ]
     )
     
@@ -58,9 +174,7 @@ def setup_logging():
     logger.setLevel(logging.INFO)
     
     # Add handlers to custom logger
-    file_handler = RotatingFileHandler('logs/ecommerce.log', maxBytes=1024*1024, backupCount=5)
-    file_handler.setFormatter(logging.Formatter(log_format))
-    logger.addHandler(file_handler)
+    logger.addHandler(rotating_file('ecommerce.log'))
     
     return logger
 
@@ -69,6 +183,9 @@ logger = setup_logging()
 
 def log_request_info():
     """Log request information"""
+    if g.get('in_batch'):
+        # Logged once for the enclosing batch request
+        return
     logger.info(f"API Request: {request.method} {request.url} - IP: {request.remote_addr} - User-Agent: {request.headers.get('User-Agent', 'Unknown')}")
 
 def log_user_action(action, details=None):
@@ -128,14 +245,87 @@ def api_response(data=None, message="Success", status_code=200, error=None):
     
     return jsonify(response), status_code
 
+def api_json_response(data_json, message="Success", status_code=200):
+    """Standard API response around a pre-encoded JSON data payload"""
+    envelope = json.dumps({
+        "success": status_code < 400,
+        "message": message,
+        "timestamp": datetime.now().isoformat()
+    })
+    body = envelope[:-1] + ', "data": ' + data_json + '}'
+    return app.response_class(body, status=status_code, mimetype='application/json')
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time before it could use the database"""
+
+def _deadline_passed():
+    deadline = g.get('deadline')
+    return deadline is not None and time.monotonic() >= deadline
+
+def _time_left():
+    """Seconds left before the request deadline, infinite without one"""
+    deadline = g.get('deadline') if has_request_context() else None
+    return math.inf if deadline is None else deadline - time.monotonic()
+
+def _request_timeout(limit):
+    """Cap a wait on the database at what is left of the request deadline"""
+    timeout = min(limit, _time_left())
+    if timeout <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before waiting on the database")
+    return timeout
+
+def _is_database_failure(error):
+    """Errors that say the database is unhealthy, not that the query was wrong"""
+    return isinstance(error, sqlite3.DatabaseError) and not isinstance(
+        error, (sqlite3.IntegrityError, sqlite3.ProgrammingError, sqlite3.DataError, sqlite3.NotSupportedError))
+
 def handle_errors(f):
     """Decorator to handle API errors"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            return f(*args, **kwargs)
+            response = f(*args, **kwargs)
+            if g.pop('db_breaker_call', False):
+                db_breaker.record_success()
+            return response
+        except CircuitOpenError as e:
+            if g.pop('db_breaker_call', False):
+                db_breaker.release()
+            log_error(e, {'operation': f.__name__})
+            response, status_code = api_response(
+                message="Database unavailable",
+                status_code=503,
+                error=str(e)
+            )
+            response.headers['Retry-After'] = str(max(math.ceil(e.retry_after), 1))
+            return response, status_code
+        except DeadlineExceeded as e:
+            if g.pop('db_breaker_call', False):
+                # Running out of time while using the database counts as a timeout
+                db_breaker.record_failure(e)
+            log_error(e, {'operation': f.__name__})
+            return api_response(
+                message="Request deadline exceeded",
+                status_code=503,
+                error=str(e)
+            )
         except Exception as e:
+            admitted = g.pop('db_breaker_call', False)
+            if _is_database_failure(e):
+                db_breaker.record_failure(e)
+            elif isinstance(e, sqlite3.Error):
+                # The database answered, the query itself was at fault
+                db_breaker.record_success()
+            elif admitted:
+                db_breaker.release()
             log_error(e, {'operation': f.__name__})
+            if isinstance(e, sqlite3.OperationalError) and _deadline_passed():
+                # Busy timeout or progress handler abort at the end of the budget
+                return api_response(
+                    message="Request deadline exceeded",
+                    status_code=503,
+                    error=str(e)
+                )
             return api_response(
                 message="Internal server error",
                 status_code=500,
@@ -143,50 +333,224 @@ def handle_errors(f):
             )
     return decorated_function
 
+def _session_id():
+    """Stable id for the client's session, created on first use.
+
+    ensure_session_id has normally minted it with the first cart write, so a
+    retried checkout carries it even if the checkout response was lost.
+    """
+    if '_id' not in session:
+        session['_id'] = secrets.token_hex(16)
+    return session['_id']
+
+def _idempotency_fingerprint():
+    """Hash of the request payload a key was first used with"""
+    return hashlib.sha256(request.get_data() or b'').hexdigest()
+
+def _replay_response(body, status_code):
+    """Build a response from a stored idempotent result"""
+    response = app.response_class(body, status=status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _claim_idempotency_key(key, fingerprint):
+    """Claim a key for this request or wait for the request that owns it.
+
+    Returns None when the caller owns the key and must run the handler,
+    otherwise the response to return to the client.
+    """
+    wait_timeout = _request_timeout(IDEMPOTENCY_WAIT_TIMEOUT)
+    admit_db_call()
+    deadline = time.time() + wait_timeout
+    conn = sqlite3.connect('ecommerce.db', timeout=wait_timeout)
+    try:
+        cursor = conn.cursor()
+        # Expire old keys once up front; waiting below only reads, so it never
+        # contends for the write lock with the request it is waiting for
+        now = time.time()
+        cursor.execute('''
+            DELETE FROM idempotency_keys
+            WHERE created_at < ? OR (status_code IS NULL AND created_at < ?)
+        ''', (now - IDEMPOTENCY_KEY_TTL, now - IDEMPOTENCY_IN_FLIGHT_TTL))
+        conn.commit()
+        stored = None
+        while True:
+            if stored is None:
+                # The key is free (at first, or because its owner gave it up): try to claim it
+                try:
+                    cursor.execute('INSERT INTO idempotency_keys (idempotency_key, fingerprint, created_at) VALUES (?, ?, ?)',
+                                  (key, fingerprint, time.time()))
+                    # Keep the store bounded by evicting the oldest completed keys
+                    cursor.execute('''
+                        DELETE FROM idempotency_keys WHERE idempotency_key IN (
+                            SELECT idempotency_key FROM idempotency_keys
+                            WHERE status_code IS NOT NULL
+                            ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                        )
+                    ''', (IDEMPOTENCY_MAX_KEYS,))
+                    conn.commit()
+                    return None
+                except sqlite3.IntegrityError:
+                    conn.commit()
+            
+            cursor.execute('SELECT fingerprint, status_code, response_body FROM idempotency_keys WHERE idempotency_key = ?', (key,))
+            stored = cursor.fetchone()
+            conn.commit()
+            if stored is None:
+                continue
+            if stored[0] != fingerprint:
+                return api_response(
+                    message="Idempotency-Key was already used with a different request payload",
+                    status_code=422
+                )
+            if stored[1] is not None:
+                logger.info(f"Replaying stored response for idempotency key {key}")
+                return _replay_response(stored[2], stored[1])
+            
+            # Another request owns the key and is still running
+            if time.time() >= deadline:
+                return api_response(
+                    message="A request with this Idempotency-Key is still in progress",
+                    status_code=409
+                )
+            time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+    finally:
+        conn.close()
+
+def _store_idempotent_response(key, response):
+    """Persist the final response for a claimed key"""
+    # The handler's work is already done, so recording it gets a short grace
+    # period past the deadline rather than leaving the key claimed
+    timeout = min(IDEMPOTENCY_WAIT_TIMEOUT, max(_time_left(), IDEMPOTENCY_STORE_GRACE))
+    conn = sqlite3.connect('ecommerce.db', timeout=timeout)
+    try:
+        cursor = conn.cursor()
+        if not 200 <= response.status_code < 300:
+            # Only successes are final; after an error (such as an empty cart)
+            # the client may fix the request and retry with the same key
+            cursor.execute('DELETE FROM idempotency_keys WHERE idempotency_key = ?', (key,))
+        else:
+            cursor.execute('UPDATE idempotency_keys SET status_code = ?, response_body = ? WHERE idempotency_key = ?',
+                          (response.status_code, response.get_data(as_text=True), key))
+        conn.commit()
+    finally:
+        conn.close()
+
+def idempotent(f=None, on_replay=None):
+    """Decorator to replay stored responses for repeated Idempotency-Key headers.
+
+    Keys are scoped to the client's session. on_replay is called when a
+    stored success is replayed, to repeat the handler's session side effects.
+    """
+    if f is None:
+        return lambda f: idempotent(f, on_replay)
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        
+        if len(key) > 255:
+            return api_response(
+                message="Idempotency-Key must be at most 255 characters",
+                status_code=400
+            )
+        
+        # Scoped to the session so other clients reusing the key never see this response
+        scoped_key = f"{_session_id()}:{key}"
+        replay = _claim_idempotency_key(scoped_key, _idempotency_fingerprint())
+        if replay is not None:
+            replay = app.make_response(replay)
+            if on_replay is not None and 200 <= replay.status_code < 300:
+                on_replay()
+            log_user_action('idempotent_replay', {'operation': f.__name__, 'idempotency_key': key})
+            return replay
+        
+        try:
+            response = app.make_response(f(*args, **kwargs))
+        except Exception:
+            _store_idempotent_response(scoped_key, app.response_class(status=500))
+            raise
+        
+        _store_idempotent_response(scoped_key, response)
+        return response
+    return decorated_function
+
+class _SharedConnection:
+    """Connection proxy handed to handlers running inside a batch request"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        # Closed by the batch request that owns the connection
+        pass
+
+def admit_db_call():
+    """Ask the circuit breaker to admit this request, once however many connections it opens"""
+    if not has_request_context():
+        db_breaker.before_call()
+        return
+    if not g.get('db_breaker_call'):
+        db_breaker.before_call()
+        # Settled as a success or failure by handle_errors
+        g.db_breaker_call = True
+
+def connect_db():
+    """Open ecommerce.db within the request deadline, if the circuit breaker allows it"""
+    deadline = g.get('deadline') if has_request_context() else None
+    timeout = 5.0
+    if deadline is not None:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise DeadlineExceeded("Request deadline exceeded before connecting to the database")
+    
+    admit_db_call()
+    
+    # The remaining budget becomes SQLite's busy timeout
+    conn = sqlite3.connect('ecommerce.db', timeout=timeout)
+    if deadline is not None:
+        # A true result from the handler aborts the running statement with "interrupted"
+        conn.set_progress_handler(lambda: time.monotonic() >= deadline, DB_PROGRESS_HANDLER_OPS)
+    return conn
+
+def get_db_connection():
+    """Open a database connection, or reuse the one shared by a batch request"""
+    if has_request_context() and g.get('db_connection') is not None:
+        return _SharedConnection(g.db_connection)
+    return connect_db()
+
 # Database initialization
 def init_db():
     try:
         start_time = time.time()
         logger.info("Starting database initialization...")
         
+        if order_shards:
+            order_shards.init()
+        
         conn = sqlite3.connect('ecommerce.db')
         cursor = conn.cursor()
         
-        # Create products table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS products (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                price REAL NOT NULL,
-                image_url TEXT,
-                stock INTEGER DEFAULT 0
-            )
-        ''')
-        
-        # Create orders table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_name TEXT NOT NULL,
-                customer_email TEXT NOT NULL,
-                total_amount REAL NOT NULL,
-                order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        # Skip DDL and seeding when the stored schema version is current
+        cursor.execute('PRAGMA user_version')
+        if cursor.fetchone()[0] == SCHEMA_VERSION:
+            conn.close()
+            if not os.path.exists(CATALOG_SNAPSHOT_PATH):
+                publish_catalog_snapshot()
+            
+            duration = time.time() - start_time
+            STARTUP_TIMINGS['init_db_ms'] = round(duration * 1000, 2)
+            STARTUP_TIMINGS['schema'] = 'current'
+            log_performance("database_initialization", duration, {'schema': 'current'})
+            logger.info(f"✅ Database schema v{SCHEMA_VERSION} is current")
+            return
         
-        # Create order_items table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS order_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER,
-                product_id INTEGER,
-                quantity INTEGER,
-                price REAL,
-                FOREIGN KEY (order_id) REFERENCES orders (id),
-                FOREIGN KEY (product_id) REFERENCES products (id)
-            )
-        ''')
+        create_schema(cursor)
         
         # Insert sample products if they don't exist
         cursor.execute('SELECT COUNT(*) FROM products')
@@ -201,11 +565,16 @@ def init_db():
             cursor.executemany('INSERT INTO products (name, description, price, image_url, stock) VALUES (?, ?, ?, ?, ?)', sample_products)
             logger.info(f"Inserted {len(sample_products)} sample products")
         
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
         conn.commit()
         conn.close()
         
+        publish_catalog_snapshot()
+        
         duration = time.time() - start_time
-        log_performance("database_initialization", duration)
+        STARTUP_TIMINGS['init_db_ms'] = round(duration * 1000, 2)
+        STARTUP_TIMINGS['schema'] = 'migrated'
+        log_performance("database_initialization", duration, {'schema': 'migrated'})
         logger.info("✅ Database initialized successfully")
         
     except Exception as e:
@@ -213,11 +582,70 @@ def init_db():
         print(f"❌ Database initialization failed: {e}")
         raise
 
+def publish_catalog_snapshot():
+    """Rebuild the shared catalog snapshot, call after products change"""
+    if not CATALOG_SNAPSHOT:
+        return
+    start_time = time.time()
+    products_count = build_snapshot('ecommerce.db', CATALOG_SNAPSHOT_PATH)
+    catalog.refresh()
+    log_performance("publish_catalog_snapshot", time.time() - start_time, {'products_count': products_count})
+
+def lookup_product(product_id, cursor=None):
+    """Find a product in the catalog snapshot, falling back to the database"""
+    if CATALOG_SNAPSHOT:
+        product = catalog.get_product(product_id)
+        if product is not None:
+            return product
+    
+    # Not published yet or newer than the snapshot
+    conn = None
+    if cursor is None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+    try:
+        cursor.row_factory = Product.from_row
+        cursor.execute(f'SELECT {Product.COLUMNS} FROM products WHERE id = ?', (product_id,))
+        product = cursor.fetchone()
+        cursor.row_factory = None
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    # Same shape as the snapshot's product dicts
+    return product.to_dict() if product else None
+
+def lookup_availability(product_ids):
+    """Return {id: (price, stock)} for the given ids from the snapshot, then the database"""
+    found = {}
+    if CATALOG_SNAPSHOT:
+        found = catalog.get_availability(product_ids) or {}
+    
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    if missing:
+        # One primary key lookup per id, passed as a single JSON array parameter
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, price, stock FROM products WHERE id IN (SELECT value FROM json_each(?))',
+                           (json.dumps(missing),))
+            for product_id, price, stock in cursor.fetchall():
+                found[product_id] = (price, stock)
+        finally:
+            conn.close()
+    return found
+
 def simulate_failures():
     """Simulate various failure scenarios"""
+    if g.get('in_batch'):
+        # Already applied once to the enclosing batch request
+        return
+    
     if SIMULATE_DB_FAILURE:
+        # Goes through the breaker like a real failure, so it trips and fails fast
+        admit_db_call()
         logger.warning("Simulating database failure")
-        raise Exception("Simulated database connection failure")
+        raise sqlite3.OperationalError("Simulated database connection failure")
     
     if SIMULATE_SLOW_RESPONSE:
         logger.warning("Simulating slow response (5 seconds)")
@@ -233,6 +661,463 @@ def simulate_failures():
         null_obj = None
         null_obj.some_attribute  # This will raise AttributeError (Python's equivalent of NullPointerException)
 
+# Order ingestion
+def _insert_order(cursor, customer_name, customer_email, total, cart_items):
+    """Insert an order and its items, returning the new order id"""
+    cursor.execute('INSERT INTO orders (customer_name, customer_email, total_amount) VALUES (?, ?, ?)',
+                  (customer_name, customer_email, total))
+    order_id = cursor.lastrowid
+    cursor.executemany('''
+        INSERT INTO order_items (order_id, product_id, quantity, price, product_name, product_description)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(order_id, item['product_id'], item['quantity'], item['price'], item.get('name'), item.get('description'))
+          for item in cart_items])
+    return order_id
+
+def commit_order(customer_name, customer_email, total, cart_items):
+    """Write an order in its own transaction"""
+    conn = get_db_connection()
+    try:
+        order_id = _insert_order(conn.cursor(), customer_name, customer_email, total, cart_items)
+        conn.commit()
+        return order_id
+    finally:
+        conn.close()
+
+class _PendingOrder:
+    """An order waiting in the ingestion queue for its batch to commit"""
+    __slots__ = ('args', 'done', 'order_id', 'error', 'state', 'lock')
+
+    def __init__(self, args):
+        self.args = args
+        self.done = threading.Event()
+        self.order_id = None
+        self.error = None
+        self.state = 'queued'
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Claim the order for the writer, False if the submitter gave up on it"""
+        with self.lock:
+            if self.state == 'cancelled':
+                return False
+            self.state = 'started'
+            return True
+
+    def cancel(self):
+        """Withdraw the order unless the writer already started on it"""
+        with self.lock:
+            if self.state == 'started':
+                return False
+            self.state = 'cancelled'
+            return True
+
+class GroupCommitWriter:
+    """Single writer thread that commits queued orders in batches.
+
+    A batch is closed once it holds max_batch_size orders or max_wait seconds
+    have passed since its first order arrived. Every order in the batch shares
+    one transaction, so the cost of the commit is paid once per batch.
+    """
+
+    def __init__(self, db_path='ecommerce.db', max_batch_size=ORDER_BATCH_MAX_SIZE, max_wait=ORDER_BATCH_MAX_WAIT):
+        self.db_path = db_path
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'batches': 0,
+            'orders': 0,
+            'failed_orders': 0,
+            'cancelled_orders': 0,
+            'last_batch_size': 0,
+            'max_batch_size': 0,
+            'last_commit_ms': 0.0,
+            'max_commit_ms': 0.0,
+            'total_commit_ms': 0.0
+        }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='order-group-commit', daemon=True)
+                    self._thread.start()
+
+    def submit(self, customer_name, customer_email, total, cart_items, timeout=ORDER_COMMIT_TIMEOUT):
+        """Queue an order and block until its batch is durable"""
+        self._ensure_started()
+        pending = _PendingOrder((customer_name, customer_email, total, cart_items))
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            if pending.cancel():
+                raise TimeoutError("Timed out waiting for order batch to commit")
+            # Already part of a transaction, so it may still commit: wait for the outcome
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.order_id
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def snapshot_metrics(self):
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        total_commit_ms = metrics.pop('total_commit_ms')
+        metrics['avg_batch_size'] = round(metrics['orders'] / metrics['batches'], 2) if metrics['batches'] else 0
+        metrics['avg_commit_ms'] = round(total_commit_ms / metrics['batches'], 2) if metrics['batches'] else 0
+        metrics['queue_depth'] = self.queue_depth()
+        return metrics
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        cursor = conn.cursor()
+        while True:
+            batch = self._collect_batch()
+            start_time = time.time()
+            failed = 0
+            cancelled = 0
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                for pending in batch:
+                    if not pending.start():
+                        # The submitter timed out and was told the order failed
+                        cancelled += 1
+                        continue
+                    # A bad order must not take the rest of the batch down with it
+                    cursor.execute('SAVEPOINT pending_order')
+                    try:
+                        pending.order_id = _insert_order(cursor, *pending.args)
+                        cursor.execute('RELEASE pending_order')
+                    except Exception as e:
+                        cursor.execute('ROLLBACK TO pending_order')
+                        cursor.execute('RELEASE pending_order')
+                        pending.error = e
+                        failed += 1
+                cursor.execute('COMMIT')
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                logger.error(f"Order group commit failed: {e}")
+                for pending in batch:
+                    pending.order_id = None
+                    pending.error = e
+                failed = len(batch) - cancelled
+            
+            duration = time.time() - start_time
+            commit_ms = round(duration * 1000, 2)
+            with self._metrics_lock:
+                self.metrics['batches'] += 1
+                self.metrics['orders'] += len(batch) - failed - cancelled
+                self.metrics['failed_orders'] += failed
+                self.metrics['cancelled_orders'] += cancelled
+                self.metrics['last_batch_size'] = len(batch)
+                self.metrics['max_batch_size'] = max(self.metrics['max_batch_size'], len(batch))
+                self.metrics['last_commit_ms'] = commit_ms
+                self.metrics['max_commit_ms'] = max(self.metrics['max_commit_ms'], commit_ms)
+                self.metrics['total_commit_ms'] += commit_ms
+            log_performance("order_group_commit", duration, {'batch_size': len(batch), 'failed_orders': failed,
+                                                             'cancelled_orders': cancelled})
+            
+            for pending in batch:
+                pending.done.set()
+
+order_writer = GroupCommitWriter()
+
+class HealthProbe:
+    """Background thread that refreshes the readiness result every interval.
+
+    Readiness requests only read the last result, so orchestrator probes never
+    touch the database themselves.
+    """
+
+    def __init__(self, interval=HEALTH_PROBE_INTERVAL):
+        self.interval = interval
+        self.result = None
+        self._first_result = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='health-probe', daemon=True)
+                    self._thread.start()
+
+    def _check_database(self):
+        if SIMULATE_DB_FAILURE:
+            return {'status': 'down', 'error': 'Simulated database connection failure'}
+        start_time = time.time()
+        try:
+            conn = sqlite3.connect('ecommerce.db', timeout=1)
+            try:
+                conn.execute('SELECT 1').fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            return {'status': 'down', 'error': str(e)}
+        return {'status': 'up', 'latency_ms': round((time.time() - start_time) * 1000, 2)}
+
+    def probe(self):
+        """Run every readiness check once and return the combined result"""
+        database = self._check_database()
+        queue_depth = order_writer.queue_depth()
+        order_queue = {
+            'mode': 'group_commit' if ORDER_GROUP_COMMIT else 'per_request',
+            'depth': queue_depth,
+            'limit': HEALTH_MAX_ORDER_QUEUE,
+            'saturation': round(queue_depth / HEALTH_MAX_ORDER_QUEUE, 3)
+        }
+        # Log handlers write synchronously, so there is never a backlog to drain
+        log_pipeline = {'mode': 'synchronous', 'backlog': 0}
+        return {
+            'ready': database['status'] == 'up' and queue_depth < HEALTH_MAX_ORDER_QUEUE,
+            'checked_at': time.time(),
+            'checks': {
+                'database': database,
+                'order_queue': order_queue,
+                'log_pipeline': log_pipeline
+            }
+        }
+
+    def _run(self):
+        while True:
+            try:
+                self.result = self.probe()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+                self.result = {'ready': False, 'checked_at': time.time(), 'checks': {'probe': {'error': str(e)}}}
+            self._first_result.set()
+            time.sleep(self.interval)
+
+    def latest(self, wait=1.0):
+        """Return the cached result, waiting briefly for the very first probe"""
+        self._ensure_started()
+        self._first_result.wait(wait)
+        return self.result
+
+health_probe = HealthProbe()
+
+def attach_archive(conn):
+    """Attach the order archive to a connection as schema "archive".
+
+    Returns False when no archive database exists yet.
+    """
+    attached = {row[1] for row in conn.execute('PRAGMA database_list')}
+    if 'archive' in attached:
+        return True
+    if not os.path.exists(ARCHIVE_DB_PATH):
+        return False
+    conn.execute('ATTACH DATABASE ? AS archive', (ARCHIVE_DB_PATH,))
+    return True
+
+def create_archive_schema(conn):
+    """Create the archive tables, mirroring orders and order_items"""
+    conn.execute('ATTACH DATABASE ? AS archive', (ARCHIVE_DB_PATH,))
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS archive.orders (
+            id INTEGER PRIMARY KEY,
+            customer_name TEXT NOT NULL,
+            customer_email TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            order_date TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS archive.order_items (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            product_id INTEGER,
+            quantity INTEGER,
+            price REAL,
+            product_name TEXT,
+            product_description TEXT
+        )
+    ''')
+    cursor = conn.cursor()
+    if add_missing_columns(cursor, 'archive', 'order_items', ORDER_ITEM_SNAPSHOT_COLUMNS):
+        backfill_order_item_snapshots(cursor, 'archive')
+    conn.execute('CREATE INDEX IF NOT EXISTS archive.idx_order_items_order_id ON order_items (order_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS archive.idx_orders_order_date ON orders (order_date)')
+
+def archive_orders(older_than_days=ORDER_ARCHIVE_AFTER_DAYS, batch_size=ORDER_ARCHIVE_BATCH_SIZE, max_batches=None):
+    """Move orders older than the cutoff into the archive database in batches.
+
+    Each batch is copied and deleted in one transaction spanning both
+    databases, so an order is always in exactly one of them. Returns the
+    number of orders moved.
+    """
+    start_time = time.time()
+    moved = 0
+    batches = 0
+    conn = sqlite3.connect('ecommerce.db', isolation_level=None, timeout=30)
+    try:
+        create_archive_schema(conn)
+        cursor = conn.cursor()
+        while max_batches is None or batches < max_batches:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT id FROM main.orders
+                WHERE order_date < datetime('now', ?)
+                ORDER BY order_date LIMIT ?
+            ''', (f'-{older_than_days} days', batch_size))
+            order_ids = [row[0] for row in cursor.fetchall()]
+            if not order_ids:
+                cursor.execute('COMMIT')
+                break
+            
+            placeholders = ','.join('?' * len(order_ids))
+            try:
+                cursor.execute(f'''
+                    INSERT INTO archive.orders (id, customer_name, customer_email, total_amount, order_date)
+                    SELECT id, customer_name, customer_email, total_amount, order_date
+                    FROM main.orders WHERE id IN ({placeholders})
+                ''', order_ids)
+                cursor.execute(f'''
+                    INSERT INTO archive.order_items (id, order_id, product_id, quantity, price, product_name, product_description)
+                    SELECT id, order_id, product_id, quantity, price, product_name, product_description
+                    FROM main.order_items WHERE order_id IN ({placeholders})
+                ''', order_ids)
+                cursor.execute(f'DELETE FROM main.order_items WHERE order_id IN ({placeholders})', order_ids)
+                cursor.execute(f'DELETE FROM main.orders WHERE id IN ({placeholders})', order_ids)
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            
+            moved += len(order_ids)
+            batches += 1
+    finally:
+        conn.close()
+    
+    if moved:
+        log_performance("archive_orders", time.time() - start_time, {'orders_moved': moved, 'batches': batches})
+    return moved
+
+class OrderArchiver:
+    """Background thread that periodically runs archive_orders"""
+
+    def __init__(self, interval=ORDER_ARCHIVE_INTERVAL):
+        self.interval = interval
+        self.stats = {'runs': 0, 'orders_archived': 0, 'last_run': None, 'last_error': None}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='order-archiver', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.stats['orders_archived'] += archive_orders()
+                self.stats['last_error'] = None
+            except Exception as e:
+                logger.error(f"Order archival failed: {e}")
+                self.stats['last_error'] = str(e)
+            self.stats['runs'] += 1
+            self.stats['last_run'] = datetime.now().isoformat()
+            time.sleep(self.interval)
+
+order_archiver = OrderArchiver()
+
+class OrderResponseCache:
+    """Size-bounded LRU of serialized order JSON keyed by order id.
+
+    Orders are immutable once committed, so entries never need invalidating;
+    the least recently used ones are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes=ORDER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, order_id):
+        with self._lock:
+            order_json = self._entries.get(order_id)
+            if order_json is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(order_id)
+            self.stats['hits'] += 1
+            return order_json
+
+    def put(self, order_id, order_json):
+        if len(order_json) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(order_id, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[order_id] = order_json
+            self.size += len(order_json)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def status(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self.size, max_bytes=self.max_bytes)
+
+order_cache = OrderResponseCache()
+
+@app.before_request
+def set_request_deadline():
+    """Give each request its time budget"""
+    g.deadline = time.monotonic() + REQUEST_DEADLINE
+
+@app.after_request
+def ensure_session_id(response):
+    """Mint the session id along with the first write to the session"""
+    if session.modified and '_id' not in session:
+        _session_id()
+    return response
+
+@app.teardown_request
+def release_db_admission(error=None):
+    """Free a breaker admission no error handler settled, so a probe is never leaked"""
+    if g.pop('db_breaker_call', False):
+        if error is not None and _is_database_failure(error):
+            db_breaker.record_failure(error)
+        else:
+            db_breaker.release()
+
+@app.before_request
+def start_background_jobs():
+    """Start opt-in background jobs in whichever worker serves first"""
+    if ORDER_ARCHIVE:
+        order_archiver.ensure_started()
+
 # API Routes
 
 @app.route('/api/products', methods=['GET'])
@@ -244,29 +1129,19 @@ def get_products():
     
     simulate_failures()
     
-    conn = sqlite3.connect('ecommerce.db')
+    conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM products')
-    products_data = cursor.fetchall()
+    cursor.row_factory = Product.from_row
+    cursor.execute(f'SELECT {Product.COLUMNS} FROM products')
+    products = cursor.fetchall()
     conn.close()
     
-    products = []
-    for product in products_data:
-        products.append({
-            'id': product[0],
-            'name': product[1],
-            'description': product[2],
-            'price': product[3],
-            'image_url': product[4],
-            'stock': product[5]
-        })
-    
     duration = time.time() - start_time
     log_performance("get_products", duration, {'products_count': len(products)})
     log_user_action('get_products', {'products_count': len(products)})
     
-    return api_response(
-        data={'products': products, 'total': len(products)},
+    return api_json_response(
+        f'{{"products": {encode_products(products)}, "total": {len(products)}}}',
         message="Products retrieved successfully"
     )
 
@@ -279,27 +1154,14 @@ def get_product(product_id):
     
     simulate_failures()
     
-    conn = sqlite3.connect('ecommerce.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-    product_data = cursor.fetchone()
-    conn.close()
+    product = lookup_product(product_id)
     
-    if not product_data:
+    if not product:
         return api_response(
             message="Product not found",
             status_code=404
         )
     
-    product = {
-        'id': product_data[0],
-        'name': product_data[1],
-        'description': product_data[2],
-        'price': product_data[3],
-        'image_url': product_data[4],
-        'stock': product_data[5]
-    }
-    
     duration = time.time() - start_time
     log_performance("get_product", duration, {'product_id': product_id})
     log_user_action('get_product', {'product_id': product_id})
@@ -309,6 +1171,119 @@ def get_product(product_id):
         message="Product retrieved successfully"
     )
 
+@app.route('/api/products/import', methods=['POST'])
+@handle_errors
+def import_products_stream():
+    """Upsert products from a streamed NDJSON or CSV request body"""
+    start_time = time.time()
+    log_request_info()
+    
+    simulate_failures()
+    
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in PRODUCT_IO_FORMATS:
+        return api_response(
+            message=f"Format must be one of {', '.join(PRODUCT_IO_FORMATS)}",
+            status_code=400
+        )
+    
+    # Parse the body line by line as it arrives instead of buffering it
+    try:
+        stats = import_products(request.stream, fmt)
+    finally:
+        # Earlier chunks may already be committed, keep the snapshot in step with them
+        publish_catalog_snapshot()
+    
+    duration = time.time() - start_time
+    log_performance("import_products", duration, {
+        'rows': stats['rows'],
+        'errors_count': stats['errors_count'],
+        'rows_per_second': stats['rows_per_second']
+    })
+    log_user_action('import_products', {'rows': stats['rows'], 'format': fmt})
+    
+    return api_response(
+        data=stats,
+        message="Products imported successfully" if not stats['errors_count'] else "Products imported with errors"
+    )
+
+@app.route('/api/products/export', methods=['GET'])
+@handle_errors
+def export_products_stream():
+    """Stream the whole catalog as NDJSON or CSV"""
+    log_request_info()
+    
+    simulate_failures()
+    
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in PRODUCT_IO_FORMATS:
+        return api_response(
+            message=f"Format must be one of {', '.join(PRODUCT_IO_FORMATS)}",
+            status_code=400
+        )
+    
+    log_user_action('export_products', {'format': fmt})
+    
+    response = app.response_class(
+        export_products(fmt),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=products.{fmt}'
+    return response
+
+@app.route('/api/products/availability', methods=['GET'])
+@handle_errors
+def get_availability():
+    """Current price and stock for a list of product ids"""
+    start_time = time.time()
+    log_request_info()
+    
+    simulate_failures()
+    
+    try:
+        # Duplicates are dropped, first occurrence keeps its position
+        product_ids = list(dict.fromkeys(int(value) for value in request.args.get('ids', '').split(',') if value.strip()))
+    except ValueError:
+        return api_response(
+            message="ids must be a comma separated list of integers",
+            status_code=400
+        )
+    
+    if not product_ids:
+        return api_response(
+            message="ids is required",
+            status_code=400
+        )
+    
+    if len(product_ids) > AVAILABILITY_MAX_IDS:
+        return api_response(
+            message=f"At most {AVAILABILITY_MAX_IDS} ids per request",
+            status_code=400
+        )
+    
+    found = lookup_availability(product_ids)
+    
+    # Rows are [id, price, stock] in request order
+    items = ','.join([
+        '[%d,%r,%s]' % (product_id, found[product_id][0],
+                        found[product_id][1] if found[product_id][1] is not None else 'null')
+        for product_id in product_ids if product_id in found
+    ])
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    
+    duration = time.time() - start_time
+    log_performance("get_availability", duration, {'ids_count': len(product_ids), 'missing_count': len(missing)})
+    log_user_action('get_availability', {'ids_count': len(product_ids)})
+    
+    response = api_json_response(
+        f'{{"fields": ["id", "price", "stock"], "items": [{items}], "missing": {json.dumps(missing)}}}',
+        message="Availability retrieved successfully"
+    )
+    # Pollers revalidate with If-None-Match and get a bodiless 304 while nothing changed
+    response.set_etag(hashlib.md5(items.encode('ascii')).hexdigest(), weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/api/cart', methods=['GET'])
 @handle_errors
 def get_cart():
@@ -325,28 +1300,22 @@ def get_cart():
             message="Cart is empty"
         )
     
-    conn = sqlite3.connect('ecommerce.db')
-    cursor = conn.cursor()
-    
     cart_items = []
     total = 0
     
     for product_id, quantity in session['cart'].items():
-        cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-        product = cursor.fetchone()
+        product = lookup_product(int(product_id))
         if product:
-            item_total = product[3] * quantity
+            item_total = product['price'] * quantity
             cart_items.append({
-                'product_id': product[0],
-                'name': product[1],
-                'price': product[3],
+                'product_id': product['id'],
+                'name': product['name'],
+                'price': product['price'],
                 'quantity': quantity,
                 'total': item_total
             })
             total += item_total
     
-    conn.close()
-    
     duration = time.time() - start_time
     log_performance("get_cart", duration, {
         'cart_items_count': len(cart_items),
@@ -386,11 +1355,7 @@ def add_to_cart():
     quantity = data.get('quantity', 1)
     
     # Validate product exists
-    conn = sqlite3.connect('ecommerce.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-    product = cursor.fetchone()
-    conn.close()
+    product = lookup_product(product_id)
     
     if not product:
         return api_response(
@@ -425,6 +1390,145 @@ def add_to_cart():
         message="Product added to cart successfully"
     )
 
+def fetch_products(product_ids, cursor):
+    """Load many products with batched IN queries, keyed by id"""
+    products = {}
+    product_ids = list(product_ids)
+    cursor.row_factory = Product.from_row
+    # Stay well below SQLite's bound parameter limit
+    for start in range(0, len(product_ids), 500):
+        chunk = product_ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT {Product.COLUMNS} FROM products WHERE id IN ({placeholders})', chunk)
+        for product in cursor.fetchall():
+            products[product.id] = product
+    cursor.row_factory = None
+    return products
+
+def _parse_cart_mutation(item, default_action):
+    """Validate one bulk cart entry, returning (action, product_id, quantity) or an error"""
+    if not isinstance(item, dict) or 'product_id' not in item:
+        return None, "product_id is required"
+    
+    action = item.get('action', default_action)
+    if action not in CART_BULK_ACTIONS:
+        return None, f"action must be one of {', '.join(CART_BULK_ACTIONS)}"
+    
+    product_id = item['product_id']
+    # Like quantity, no coercion: true or 2.9 must not quietly become a product id
+    if isinstance(product_id, str) and product_id.isdecimal():
+        product_id = int(product_id)
+    if not isinstance(product_id, int) or isinstance(product_id, bool):
+        return None, "product_id must be an integer"
+    
+    quantity = item.get('quantity', 1)
+    if action != 'remove' and (not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 0
+                               or (action == 'add' and quantity == 0)):
+        return None, "quantity must be a positive integer"
+    
+    return (action, product_id, quantity), None
+
+@app.route('/api/cart/items', methods=['POST'])
+@handle_errors
+def update_cart_items():
+    """Add, set or remove many cart items in one atomic update"""
+    start_time = time.time()
+    log_request_info()
+    
+    simulate_failures()
+    
+    data = request.get_json()
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return api_response(
+            message="A list of items is required",
+            status_code=400
+        )
+    
+    if len(data['items']) > CART_BULK_MAX_ITEMS:
+        return api_response(
+            message=f"At most {CART_BULK_MAX_ITEMS} items can be updated at once",
+            status_code=413
+        )
+    
+    default_action = data.get('action', 'add')
+    mutations = []
+    errors = []
+    for index, item in enumerate(data['items']):
+        mutation, error = _parse_cart_mutation(item, default_action)
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            mutations.append(mutation)
+    
+    if errors:
+        return api_response(
+            data={'errors': errors},
+            message="Invalid cart items, cart was not changed",
+            status_code=400
+        )
+    
+    cart = dict(session.get('cart', {}))
+    
+    # One query both validates the request and prices the resulting cart
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    product_ids = {product_id for _, product_id, _ in mutations} | {int(product_id) for product_id in cart}
+    products = fetch_products(product_ids, cursor)
+    conn.close()
+    
+    missing = [{'index': index, 'error': "Product not found"}
+               for index, (action, product_id, _) in enumerate(mutations)
+               if action != 'remove' and product_id not in products]
+    if missing:
+        return api_response(
+            data={'errors': missing},
+            message="Product not found, cart was not changed",
+            status_code=404
+        )
+    
+    # Apply every mutation to a copy so the session only changes if all succeed
+    for action, product_id, quantity in mutations:
+        key = str(product_id)
+        if action == 'add':
+            cart[key] = cart.get(key, 0) + quantity
+        elif action == 'set' and quantity > 0:
+            cart[key] = quantity
+        else:
+            cart.pop(key, None)
+    session['cart'] = cart
+    
+    cart_items = []
+    total = 0
+    for product_id, quantity in cart.items():
+        product = products.get(int(product_id))
+        if product:
+            item_total = product.price * quantity
+            cart_items.append({
+                'product_id': product.id,
+                'name': product.name,
+                'price': product.price,
+                'quantity': quantity,
+                'total': item_total
+            })
+            total += item_total
+    
+    duration = time.time() - start_time
+    log_performance("update_cart_items", duration, {'mutations_count': len(mutations)})
+    log_user_action('update_cart_items', {
+        'mutations_count': len(mutations),
+        'cart_items_count': len(cart_items),
+        'cart_total': total
+    })
+    
+    return api_response(
+        data={
+            'items': cart_items,
+            'total': total,
+            'item_count': len(cart_items)
+        },
+        message="Cart updated successfully"
+    )
+
 @app.route('/api/cart/remove/<int:product_id>', methods=['DELETE'])
 @handle_errors
 def remove_from_cart(product_id):
@@ -488,6 +1592,7 @@ def clear_cart():
 
 @app.route('/api/orders', methods=['POST'])
 @handle_errors
+@idempotent(on_replay=lambda: session.pop('cart', None))
 def create_order():
     """Create a new order"""
     start_time = time.time()
@@ -512,35 +1617,37 @@ def create_order():
     customer_name = data['customer_name']
     customer_email = data['customer_email']
     
-    conn = sqlite3.connect('ecommerce.db')
+    conn = get_db_connection()
     cursor = conn.cursor()
     
     # Calculate total
     total = 0
     cart_items = []
+    products = fetch_products([int(product_id) for product_id in session['cart']], cursor)
     for product_id, quantity in session['cart'].items():
-        cursor.execute('SELECT price FROM products WHERE id = ?', (product_id,))
-        product = cursor.fetchone()
-        if product:
-            total += product[0] * quantity
-            cart_items.append({'product_id': product_id, 'quantity': quantity, 'price': product[0]})
-    
-    # Create order
-    cursor.execute('INSERT INTO orders (customer_name, customer_email, total_amount) VALUES (?, ?, ?)',
-                  (customer_name, customer_email, total))
-    order_id = cursor.lastrowid
-    
-    # Add order items
-    for product_id, quantity in session['cart'].items():
-        cursor.execute('SELECT price FROM products WHERE id = ?', (product_id,))
-        product = cursor.fetchone()
+        product = products.get(int(product_id))
         if product:
-            cursor.execute('INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)',
-                         (order_id, product_id, quantity, product[0]))
+            total += product.price * quantity
+            cart_items.append({'product_id': product_id, 'quantity': quantity, 'price': product.price,
+                               'name': product.name, 'description': product.description})
     
-    conn.commit()
     conn.close()
     
+    # Create order
+    if order_shards:
+        order_id = order_shards.insert_order(customer_name, customer_email, total, cart_items,
+                                             timeout=_request_timeout(SHARD_TIMEOUT))
+    elif ORDER_GROUP_COMMIT:
+        try:
+            order_id = order_writer.submit(customer_name, customer_email, total, cart_items,
+                                           timeout=_request_timeout(ORDER_COMMIT_TIMEOUT))
+        except TimeoutError:
+            if _deadline_passed():
+                raise DeadlineExceeded("Request deadline exceeded waiting for the order batch to commit")
+            raise
+    else:
+        order_id = commit_order(customer_name, customer_email, total, cart_items)
+    
     # Clear cart
     cart_total_items = sum(session['cart'].values())
     session.pop('cart', None)
@@ -580,31 +1687,77 @@ def get_orders():
     
     simulate_failures()
     
-    conn = sqlite3.connect('ecommerce.db')
+    include_archived = request.args.get('include_archived', 'false').lower() in ('1', 'true', 'yes')
+    
+    conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM orders ORDER BY order_date DESC')
-    orders_data = cursor.fetchall()
+    cursor.row_factory = Order.from_row
+    if order_shards:
+        orders = list(order_shards.iter_orders(timeout=_request_timeout(SHARD_TIMEOUT)))
+    elif include_archived and attach_archive(conn):
+        cursor.execute(f'''
+            SELECT {Order.COLUMNS} FROM main.orders
+            UNION ALL
+            SELECT {Order.COLUMNS} FROM archive.orders
+            ORDER BY order_date DESC
+        ''')
+        orders = cursor.fetchall()
+    else:
+        # Only the hot set unless history is asked for
+        cursor.execute(f'SELECT {Order.COLUMNS} FROM orders ORDER BY order_date DESC')
+        orders = cursor.fetchall()
     conn.close()
     
-    orders = []
-    for order in orders_data:
-        orders.append({
-            'id': order[0],
-            'customer_name': order[1],
-            'customer_email': order[2],
-            'total_amount': order[3],
-            'order_date': order[4]
-        })
-    
     duration = time.time() - start_time
-    log_performance("get_orders", duration, {'orders_count': len(orders)})
+    log_performance("get_orders", duration, {'orders_count': len(orders), 'include_archived': include_archived})
     log_user_action('get_orders', {'orders_count': len(orders)})
     
-    return api_response(
-        data={'orders': orders, 'total': len(orders)},
+    return api_json_response(
+        f'{{"orders": {encode_orders(orders)}, "total": {len(orders)}}}',
         message="Orders retrieved successfully"
     )
 
+@app.route('/api/orders/export', methods=['GET'])
+@handle_errors
+def export_orders_stream():
+    """Stream orders with their items as CSV or NDJSON, optionally gzipped"""
+    log_request_info()
+    
+    simulate_failures()
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ORDER_EXPORT_FORMATS:
+        return api_response(
+            message=f"Format must be one of {', '.join(ORDER_EXPORT_FORMATS)}",
+            status_code=400
+        )
+    
+    try:
+        date_from = parse_date_bound(request.args['from']) if request.args.get('from') else MIN_DATE
+        date_to = parse_date_bound(request.args['to'], end=True) if request.args.get('to') else MAX_DATE
+    except ValueError:
+        return api_response(
+            message="from and to must be dates (YYYY-MM-DD) or ISO timestamps",
+            status_code=400
+        )
+    
+    compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+    
+    log_user_action('export_orders', {
+        'format': fmt,
+        'from': request.args.get('from'),
+        'to': request.args.get('to'),
+        'gzip': compress
+    })
+    
+    filename = f'orders.{fmt}.gz' if compress else f'orders.{fmt}'
+    response = app.response_class(
+        export_orders(fmt, date_from, date_to, 'ecommerce.db', ARCHIVE_DB_PATH, order_shards, compress),
+        mimetype='application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
 @app.route('/api/orders/<int:order_id>', methods=['GET'])
 @handle_errors
 def get_order(order_id):
@@ -614,56 +1767,146 @@ def get_order(order_id):
     
     simulate_failures()
     
-    conn = sqlite3.connect('ecommerce.db')
-    cursor = conn.cursor()
+    order_json = order_cache.get(order_id)
+    if order_json is None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        if order_shards:
+            order = None
+            # The id routes straight to the owning shard
+            sharded = order_shards.get_order(order_id, timeout=_request_timeout(SHARD_TIMEOUT))
+            if sharded:
+                order, item_rows = sharded
+                items = [OrderItem(*row) for row in item_rows]
+        else:
+            # Look in the hot tables first, then fall through to the archive
+            order = None
+            for schema in ('main', 'archive'):
+                if schema == 'archive' and not attach_archive(conn):
+                    break
+                cursor.row_factory = Order.from_row
+                cursor.execute(f'SELECT {Order.COLUMNS} FROM {schema}.orders WHERE id = ?', (order_id,))
+                order = cursor.fetchone()
+                if order:
+                    break
+            
+            if order:
+                # Product details were snapshotted at write time, no JOIN needed
+                cursor.row_factory = OrderItem.from_row
+                cursor.execute(f'SELECT {OrderItem.COLUMNS} FROM {schema}.order_items WHERE order_id = ? ORDER BY id',
+                               (order_id,))
+                items = cursor.fetchall()
+        
+        conn.close()
+        
+        if not order:
+            return api_response(
+                message="Order not found",
+                status_code=404
+            )
+        
+        # The order object gains an "items" key next to its own columns
+        order_json = encode_order(order)[:-1] + ',"items":' + encode_order_items(items) + '}'
+        order_cache.put(order_id, order_json)
     
-    # Get order details
-    cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
-    order_data = cursor.fetchone()
+    duration = time.time() - start_time
+    log_performance("get_order", duration, {'order_id': order_id})
+    log_user_action('get_order', {'order_id': order_id})
     
-    if not order_data:
-        return api_response(
-            message="Order not found",
-            status_code=404
-        )
+    response = api_json_response(
+        f'{{"order": {order_json}}}',
+        message="Order retrieved successfully"
+    )
+    response.headers['Cache-Control'] = ORDER_CACHE_CONTROL
+    return response
+
+def _run_sub_request(sub):
+    """Dispatch one batch item to its route inside the current request context"""
+    if not isinstance(sub, dict) or 'path' not in sub:
+        return app.make_response(api_response(message="Each request needs a path", status_code=400))
+    if not isinstance(sub['path'], str):
+        return app.make_response(api_response(message="path must be a string", status_code=400))
+    if not isinstance(sub.get('headers') or {}, dict):
+        return app.make_response(api_response(message="headers must be an object", status_code=400))
+    
+    method = str(sub.get('method', 'GET')).upper()
+    headers = {'User-Agent': request.headers.get('User-Agent', 'Unknown')}
+    headers.update(sub.get('headers') or {})
+    builder = EnvironBuilder(
+        path=sub['path'],
+        method=method,
+        headers=headers,
+        json=sub.get('body'),
+        environ_base={'REMOTE_ADDR': request.remote_addr}
+    )
+    sub_request = app.request_class(builder.get_environ())
     
-    # Get order items
-    cursor.execute('''
-        SELECT oi.*, p.name, p.description 
-        FROM order_items oi 
-        JOIN products p ON oi.product_id = p.id 
-        WHERE oi.order_id = ?
-    ''', (order_id,))
-    items_data = cursor.fetchall()
+    ctx = request_ctx._get_current_object()
+    outer_request = ctx.request
+    ctx.request = sub_request
+    try:
+        endpoint, view_args = app.url_map.bind_to_environ(sub_request.environ).match()
+        if endpoint == 'batch':
+            return app.make_response(api_response(message="Batch requests cannot be nested", status_code=400))
+        return app.make_response(app.view_functions[endpoint](**view_args))
+    except HTTPException as e:
+        return app.make_response(api_response(message=e.description, status_code=e.code))
+    finally:
+        ctx.request = outer_request
+
+@app.route('/api/batch', methods=['POST'])
+@handle_errors
+def batch():
+    """Run several API requests in one round trip"""
+    start_time = time.time()
+    log_request_info()
     
-    conn.close()
+    simulate_failures()
     
-    order = {
-        'id': order_data[0],
-        'customer_name': order_data[1],
-        'customer_email': order_data[2],
-        'total_amount': order_data[3],
-        'order_date': order_data[4],
-        'items': []
-    }
+    data = request.get_json()
+    if not data or not isinstance(data.get('requests'), list):
+        return api_response(
+            message="A list of requests is required",
+            status_code=400
+        )
+    
+    sub_requests = data['requests']
+    if len(sub_requests) > BATCH_MAX_REQUESTS:
+        return api_response(
+            message=f"Batch size is limited to {BATCH_MAX_REQUESTS} requests",
+            status_code=413
+        )
     
-    for item in items_data:
-        order['items'].append({
-            'product_id': item[2],
-            'name': item[5],
-            'description': item[6],
-            'quantity': item[3],
-            'price': item[4],
-            'total': item[3] * item[4]
-        })
+    g.db_connection = connect_db()
+    g.in_batch = True
+    try:
+        responses = []
+        for index, sub in enumerate(sub_requests):
+            try:
+                response = _run_sub_request(sub)
+            except Exception:
+                g.db_connection.rollback()
+                raise
+            if response.status_code >= 400:
+                # Discard a failed item's uncommitted writes before the next item can commit them
+                g.db_connection.rollback()
+            responses.append({
+                'index': index,
+                'status': response.status_code,
+                'body': response.get_json(silent=True)
+            })
+    finally:
+        g.in_batch = False
+        g.db_connection.close()
+        g.db_connection = None
     
     duration = time.time() - start_time
-    log_performance("get_order", duration, {'order_id': order_id})
-    log_user_action('get_order', {'order_id': order_id})
+    log_performance("batch", duration, {'requests_count': len(responses)})
     
     return api_response(
-        data={'order': order},
-        message="Order retrieved successfully"
+        data={'responses': responses, 'total': len(responses)},
+        message="Batch processed successfully"
     )
 
 # Failure simulation routes
@@ -729,6 +1972,15 @@ def health_check():
                 "status": "healthy",
                 "database": "connected",
                 "products": product_count,
+                "startup": STARTUP_TIMINGS,
+                "order_archive": dict(order_archiver.stats, enabled=ORDER_ARCHIVE),
+                "order_cache": order_cache.status(),
+                "database_breaker": db_breaker.status(),
+                "request_deadline_ms": round(REQUEST_DEADLINE * 1000),
+                "order_ingestion": {
+                    "mode": "group_commit" if ORDER_GROUP_COMMIT else "per_request",
+                    "metrics": order_writer.snapshot_metrics()
+                },
                 "simulations": {
                     "db_failure": SIMULATE_DB_FAILURE,
                     "slow_response": SIMULATE_SLOW_RESPONSE,
@@ -750,6 +2002,37 @@ def health_check():
             status_code=500
         )
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe, answers without touching any dependency"""
+    return api_response(
+        data={"status": "alive"},
+        message="Application is alive"
+    )
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe, served from the cached background probe result"""
+    result = health_probe.latest()
+    if result is None:
+        return api_response(
+            data={"status": "starting"},
+            message="Readiness probe has not completed yet",
+            status_code=503
+        )
+    
+    age = time.time() - result['checked_at']
+    ready = result['ready'] and age < HEALTH_PROBE_INTERVAL * 3
+    return api_response(
+        data={
+            "status": "ready" if ready else "not_ready",
+            "age_seconds": round(age, 2),
+            "checks": result['checks']
+        },
+        message="Application is ready" if ready else "Application is not ready",
+        status_code=200 if ready else 503
+    )
+
 @app.route('/api/logs', methods=['GET'])
 def view_logs():
     """View application logs (for debugging)"""
@@ -792,21 +2075,31 @@ def api_info():
             "endpoints": {
                 "products": {
                     "GET /api/products": "Get all products",
-                    "GET /api/products/{id}": "Get specific product"
+                    "GET /api/products/{id}": "Get specific product",
+                    "POST /api/products/import": "Stream an NDJSON or CSV catalog into the database",
+                    "GET /api/products/export": "Stream the catalog as NDJSON or CSV",
+                    "GET /api/products/availability": "Price and stock for up to AVAILABILITY_MAX_IDS ids (?ids=1,2,3)"
                 },
                 "cart": {
                     "GET /api/cart": "Get current cart",
                     "POST /api/cart/add": "Add product to cart",
+                    "POST /api/cart/items": "Add, set or remove many cart items at once",
                     "DELETE /api/cart/remove/{id}": "Remove product from cart",
                     "DELETE /api/cart/clear": "Clear entire cart"
                 },
                 "orders": {
-                    "GET /api/orders": "Get all orders",
+                    "GET /api/orders": "Get all orders (add ?include_archived=true for archived history)",
+                    "GET /api/orders/export": "Stream orders with items as CSV or NDJSON (?from=&to=&format=&gzip=)",
                     "GET /api/orders/{id}": "Get specific order",
-                    "POST /api/orders": "Create new order"
+                    "POST /api/orders": "Create new order (supports Idempotency-Key header)"
+                },
+                "batch": {
+                    "POST /api/batch": "Run several API requests in one round trip"
                 },
                 "system": {
                     "GET /api/health": "Health check",
+                    "GET /api/health/live": "Liveness probe",
+                    "GET /api/health/ready": "Readiness probe (cached background result)",
                     "GET /api/logs": "View application logs",
                     "GET /api/simulate/{type}": "Simulate failures (db-failure, slow-response, random-errors, null-pointer)"
                 }
@@ -815,8 +2108,12 @@ def api_info():
         message="API information"
     )
 
+STARTUP_TIMINGS['import_ms'] = round((time.perf_counter() - _import_started) * 1000, 2)
+
 if __name__ == '__main__':
     logger.info("Starting E-Commerce API...")
     init_db()
-    logger.info("API startup complete")
+    STARTUP_TIMINGS['startup_ms'] = round((time.perf_counter() - _import_started) * 1000, 2)
+    logger.info(f"API startup complete (import {STARTUP_TIMINGS['import_ms']}ms, "
+                f"startup {STARTUP_TIMINGS['startup_ms']}ms)")
     app.run(debug=False, host='0.0.0.0', port=8000) 
\ No newline at end of file
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark order ingestion: per-request commits vs group commit
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+def run_benchmark(label, write_order, orders, concurrency):
+    """Write orders from several threads and return orders/second"""
+    cart_items = [{'product_id': 1, 'quantity': 1, 'price': 999.99},
+                  {'product_id': 3, 'quantity': 2, 'price': 199.99}]
+    per_thread = orders // concurrency
+    
+    def worker(n):
+        for i in range(per_thread):
+            write_order(f"Bench {n}-{i}", "bench@example.com", 1399.97, cart_items)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start_time = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.time() - start_time
+    
+    rate = (per_thread * concurrency) / duration
+    print(f"{label:<14} {per_thread * concurrency:>7} orders in {duration:6.2f}s  {rate:10.1f} orders/s")
+    return rate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--batch-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+    
+    # Run against a scratch database so the real one is untouched
+    os.chdir(tempfile.mkdtemp(prefix='order-bench-'))
+    import app
+    app.logger.disabled = True
+    app.init_db()
+    
+    # The database lock is contended by design, give writers room to wait
+    def per_request(*order):
+        while True:
+            try:
+                return app.commit_order(*order)
+            except app.sqlite3.OperationalError:
+                time.sleep(0.001)
+    
+    writer = app.GroupCommitWriter(max_batch_size=args.batch_size, max_wait=args.batch_wait_ms / 1000)
+    
+    print(f"🚀 {args.orders} orders, {args.concurrency} concurrent writers")
+    baseline = run_benchmark("per-request", per_request, args.orders, args.concurrency)
+    grouped = run_benchmark("group-commit", writer.submit, args.orders, args.concurrency)
+    
+    metrics = writer.snapshot_metrics()
+    print(f"📊 Batches: {metrics['batches']}, avg size {metrics['avg_batch_size']}, "
+          f"avg commit {metrics['avg_commit_ms']}ms, max commit {metrics['max_commit_ms']}ms")
+    print(f"⚡ Speedup: {grouped / baseline:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark list endpoint serialization: index-built dicts vs row models
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+def legacy_products(conn, jsonify):
+    """Previous get_products path: SELECT *, dict per row, jsonify"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM products')
+    products = []
+    for product in cursor.fetchall():
+        products.append({
+            'id': product[0],
+            'name': product[1],
+            'description': product[2],
+            'price': product[3],
+            'image_url': product[4],
+            'stock': product[5]
+        })
+    return jsonify({'products': products, 'total': len(products)}).get_data()
+
+def legacy_orders(conn, jsonify):
+    """Previous get_orders path: SELECT *, dict per row, jsonify"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM orders ORDER BY order_date DESC')
+    orders = []
+    for order in cursor.fetchall():
+        orders.append({
+            'id': order[0],
+            'customer_name': order[1],
+            'customer_email': order[2],
+            'total_amount': order[3],
+            'order_date': order[4]
+        })
+    return jsonify({'orders': orders, 'total': len(orders)}).get_data()
+
+def model_products(conn, models):
+    cursor = conn.cursor()
+    cursor.row_factory = models.Product.from_row
+    cursor.execute(f'SELECT {models.Product.COLUMNS} FROM products')
+    products = cursor.fetchall()
+    return f'{{"products": {models.encode_products(products)}, "total": {len(products)}}}'.encode()
+
+def model_orders(conn, models):
+    cursor = conn.cursor()
+    cursor.row_factory = models.Order.from_row
+    cursor.execute(f'SELECT {models.Order.COLUMNS} FROM orders ORDER BY order_date DESC')
+    orders = cursor.fetchall()
+    return f'{{"orders": {models.encode_orders(orders)}, "total": {len(orders)}}}'.encode()
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    # Run against a scratch database so the real one is untouched
+    os.chdir(tempfile.mkdtemp(prefix='serialization-bench-'))
+    import app
+    import models
+    app.logger.disabled = True
+    app.init_db()
+    
+    conn = sqlite3.connect('ecommerce.db')
+    conn.executemany('INSERT INTO products (name, description, price, image_url, stock) VALUES (?, ?, ?, ?, ?)',
+                     ((f'Product {i}', f'Description for product {i}', 9.99 + i % 500, f'/static/{i}.jpg', i % 50)
+                      for i in range(args.rows)))
+    conn.executemany('INSERT INTO orders (customer_name, customer_email, total_amount) VALUES (?, ?, ?)',
+                     ((f'Customer {i}', f'customer{i}@example.com', 19.99 + i % 1000) for i in range(args.rows)))
+    conn.commit()
+    
+    print(f"🚀 Serializing {args.rows} rows, best of {args.repeat}")
+    with app.app.app_context():
+        for label, legacy, modelled in (('products', legacy_products, model_products),
+                                        ('orders', legacy_orders, model_orders)):
+            before = best_of(args.repeat, legacy, conn, app.jsonify)
+            after = best_of(args.repeat, modelled, conn, models)
+            print(f"{label:<10} dicts+jsonify {before * 1000:8.1f}ms   models {after * 1000:8.1f}ms   "
+                  f"{before / after:4.1f}x")
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark order write throughput as the number of order shards grows
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+
+from order_shards import ShardedOrderStore
+
+def run_benchmark(shard_count, orders, concurrency):
+    """Insert orders from several threads into a fresh store, return orders/second"""
+    store = ShardedOrderStore(tempfile.mkdtemp(prefix=f'shard-bench-{shard_count}-'), shard_count, 'order')
+    store.init()
+    cart_items = [{'product_id': 1, 'quantity': 1, 'price': 999.99},
+                  {'product_id': 3, 'quantity': 2, 'price': 199.99}]
+    per_thread = orders // concurrency
+    
+    def worker(n):
+        for i in range(per_thread):
+            store.insert_order(f"Bench {n}-{i}", f"bench{n}-{i}@example.com", 1399.97, cart_items)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start_time = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.time() - start_time
+    
+    return (per_thread * concurrency) / duration
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    
+    print(f"🚀 {args.orders} orders, {args.concurrency} concurrent writers, one commit per order")
+    baseline = None
+    for shard_count in args.shards:
+        rate = run_benchmark(shard_count, args.orders, args.concurrency)
+        baseline = baseline or rate
+        print(f"{shard_count:>3} shards  {rate:10.1f} orders/s  {rate / baseline:4.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Read-optimized catalog snapshot shared by worker processes through mmap.
+
+File layout (little endian):
+
+    header   MAGIC, version, record count, string table offset
+    records  fixed-width rows sorted by product id:
+             id, price, stock, then (offset, length) pairs for
+             name, description and image_url in the string table
+    strings  UTF-8 bytes referenced by the records
+
+A new snapshot is written next to the live one and published with an atomic
+rename, so readers always see either the old or the new file. Readers stat the
+path periodically and re-map it when it has been replaced.
+"""
+
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+MAGIC = b'CATS'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQ')
+RECORD = struct.Struct('<qdqIIIIII')
+APP_DB_PATH = 'ecommerce.db'
+
+def default_snapshot_path(db_path):
+    """The live snapshot the app serves, if db_path is the app database, else None"""
+    if os.path.abspath(db_path) != os.path.abspath(APP_DB_PATH):
+        return None
+    return os.environ.get('CATALOG_SNAPSHOT_PATH', 'catalog.snapshot')
+
+def build_snapshot(db_path, snapshot_path, chunk_size=10000):
+    """Write the products table to a new snapshot and publish it atomically.
+
+    Rows are streamed from the cursor; records and strings are spooled to two
+    temporary files and joined behind the header, so memory stays flat however
+    large the catalog is.
+    """
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    count = 0
+    strings_size = 0
+    with tempfile.TemporaryFile(dir=directory) as records, tempfile.TemporaryFile(dir=directory) as strings:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.execute('SELECT id, name, description, price, image_url, stock FROM products ORDER BY id')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for product_id, name, description, price, image_url, stock in rows:
+                    fields = []
+                    for value in (name, description, image_url):
+                        encoded = value.encode('utf-8') if value is not None else b''
+                        # Length 0xFFFFFFFF marks a NULL column
+                        fields.extend((strings_size, len(encoded) if value is not None else 0xFFFFFFFF))
+                        strings.write(encoded)
+                        strings_size += len(encoded)
+                    records.write(RECORD.pack(product_id, price, stock or 0, *fields))
+                    count += 1
+        finally:
+            conn.close()
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.catalog-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, count, HEADER.size + count * RECORD.size))
+                for part in (records, strings):
+                    part.seek(0)
+                    shutil.copyfileobj(part, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, snapshot_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    return count
+
+class _MappedSnapshot:
+    """One mapped snapshot file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.strings_offset = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported catalog snapshot format in {path}")
+        self._columns = None
+
+    def _string(self, offset, length):
+        if length == 0xFFFFFFFF:
+            return None
+        start = self.strings_offset + offset
+        return str(self.buffer[start:start + length], 'utf-8')
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.buffer, HEADER.size + index * RECORD.size)
+
+    def find(self, product_id):
+        """Binary search the sorted records for a product id"""
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            record = self._record(middle)
+            if record[0] == product_id:
+                return record
+            if record[0] < product_id:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def columns(self):
+        """Strided (ids, prices, stocks) views straight over the mapped records.
+
+        The id, price and stock fields are the first three 8-byte words of
+        each record, so casting the record area to 8-byte items and taking
+        every RECORD.size // 8-th one reads a column without unpacking rows.
+        """
+        if self._columns is None:
+            stride = RECORD.size // 8
+            records = memoryview(self.buffer)[HEADER.size:HEADER.size + self.count * RECORD.size]
+            self._columns = (records.cast('q')[0::stride], records.cast('d')[1::stride], records.cast('q')[2::stride])
+        return self._columns
+
+    def availability(self, product_ids):
+        """Return {id: (price, stock)} for the ids present in the snapshot"""
+        if sys.byteorder != 'little':
+            # The column views use native byte order
+            found = {}
+            for product_id in product_ids:
+                record = self.find(product_id)
+                if record is not None:
+                    found[product_id] = (record[1], record[2])
+            return found
+        ids, prices, stocks = self.columns()
+        found = {}
+        for product_id in product_ids:
+            index = bisect_left(ids, product_id)
+            if index < self.count and ids[index] == product_id:
+                found[product_id] = (prices[index], stocks[index])
+        return found
+
+    def product(self, product_id):
+        record = self.find(product_id)
+        if record is None:
+            return None
+        return {
+            'id': record[0],
+            'name': self._string(record[3], record[4]),
+            'description': self._string(record[5], record[6]),
+            'price': record[1],
+            'image_url': self._string(record[7], record[8]),
+            'stock': record[2]
+        }
+
+class CatalogSnapshot:
+    """Process-local handle on the shared snapshot that follows republishes"""
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._mapped = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._mapped
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._mapped
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._mapped = None
+                return None
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if self._mapped is None or self._mapped.identity != identity:
+                # The previous mapping is released once no lookup holds it
+                self._mapped = _MappedSnapshot(self.path)
+            return self._mapped
+
+    def refresh(self):
+        """Re-check the snapshot file on the next lookup"""
+        self._checked_at = 0.0
+
+    def available(self):
+        return self._current() is not None
+
+    def get_product(self, product_id):
+        """Return the product dict, or None if absent or no snapshot is published"""
+        mapped = self._current()
+        if mapped is None:
+            return None
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return None
+        return mapped.product(product_id)
+
+    def get_availability(self, product_ids):
+        """Return {id: (price, stock)} for known ids, or None if no snapshot is published"""
+        mapped = self._current()
+        if mapped is None:
+            return None
+        return mapped.availability(product_ids)
@@ -0,0 +1,109 @@
+"""
+Circuit breaker for calls to a shared dependency.
+
+closed     calls pass through; consecutive failures are counted
+open       calls fail fast with CircuitOpenError until reset_timeout passes
+half_open  a limited number of probe calls pass through; one success closes
+           the circuit again, one failure re-opens it. Probes that are never
+           settled expire after reset_timeout, so a lost probe cannot wedge it.
+"""
+
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while the circuit is open"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit is open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker"""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+        self.half_open_at = None
+        self.last_error = None
+        self.stats = {'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.half_open_calls = 0
+        self.stats['opened'] += 1
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = self._clock()
+            if self.state == OPEN:
+                retry_after = self.opened_at + self.reset_timeout - now
+                if retry_after > 0:
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, retry_after)
+                self.state = HALF_OPEN
+                self.half_open_calls = 0
+            if self.half_open_calls >= self.half_open_max_calls:
+                retry_after = self.half_open_at + self.reset_timeout - now
+                if retry_after > 0:
+                    # Probes are already in flight, keep failing fast until they settle
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, retry_after)
+                # The in-flight probes were never settled, give up on them
+                self.half_open_calls = 0
+            self.half_open_calls += 1
+            self.half_open_at = now
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.opened_at = None
+                self.half_open_calls = 0
+
+    def release(self):
+        """End an admitted call that says nothing about the dependency's health"""
+        with self._lock:
+            if self.state == HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.stats['failures'] += 1
+            self.last_error = str(error) if error is not None else None
+            if self.state == HALF_OPEN or (self.state == CLOSED and
+                                           self.consecutive_failures >= self.failure_threshold):
+                self._open(self._clock())
+
+    def status(self):
+        with self._lock:
+            retry_after = None
+            if self.state == OPEN:
+                retry_after = round(max(self.opened_at + self.reset_timeout - self._clock(), 0), 2)
+            return dict(
+                self.stats,
+                state=self.state,
+                consecutive_failures=self.consecutive_failures,
+                failure_threshold=self.failure_threshold,
+                reset_timeout_s=self.reset_timeout,
+                retry_after_s=retry_after,
+                last_error=self.last_error
+            )
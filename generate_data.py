@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for realistic scale testing
+
+Bulk-loads a fresh database with products, orders and order items. Product
+popularity follows a Zipf distribution, order dates follow a growth trend with
+weekly and daily seasonality, and the same seed and arguments always produce
+the same data.
+
+Usage:
+    python generate_data.py --products 100000 --orders 2000000 --items-per-order 3
+    python generate_data.py --db scale.db --orders 10000000 --seed 7 --force
+"""
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from catalog_snapshot import build_snapshot, default_snapshot_path
+from schema import SCHEMA_VERSION, create_schema
+
+BATCH_SIZE = 50000
+
+CATEGORIES = ('Laptop', 'Smartphone', 'Headphones', 'Tablet', 'Smartwatch', 'Camera', 'Speaker',
+              'Monitor', 'Keyboard', 'Mouse', 'Charger', 'Router', 'Drone', 'Console', 'Printer')
+ADJECTIVES = ('Pro', 'Max', 'Mini', 'Ultra', 'Lite', 'Air', 'Plus', 'Neo', 'Prime', 'Edge')
+FIRST_NAMES = ('Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+               'Priya', 'Wei', 'Omar', 'Sofia', 'Lucas', 'Amara', 'Kenji', 'Elena', 'Mateo', 'Noor')
+LAST_NAMES = ('Smith', 'Garcia', 'Chen', 'Patel', 'Kim', 'Nguyen', 'Müller', 'Rossi', 'Silva', 'Okafor',
+              'Johnson', 'Ivanova', 'Tanaka', 'Haddad', 'Kowalski', 'Brown', 'Dubois', 'Singh', 'Lopez', 'Ali')
+
+# Relative order volume by weekday (Monday first) and by hour of day
+WEEKDAY_WEIGHTS = (1.0, 0.95, 0.95, 1.0, 1.1, 1.35, 1.3)
+HOUR_WEIGHTS = (0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.3, 0.6, 0.9, 1.0, 1.1, 1.2,
+                1.4, 1.3, 1.1, 1.0, 1.0, 1.1, 1.4, 1.8, 2.0, 1.8, 1.2, 0.6)
+
+def zipf_cum_weights(n, s):
+    """Cumulative Zipf weights for ranks 1..n"""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+def _batched(rows, size=BATCH_SIZE):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def generate_products(rng, count):
+    """Yield product rows with log-normally distributed prices"""
+    for product_id in range(1, count + 1):
+        category = rng.choice(CATEGORIES)
+        name = f"{category} {rng.choice(ADJECTIVES)} {product_id}"
+        price = round(min(max(rng.lognormvariate(4.5, 1.0), 1.0), 5000.0), 2)
+        yield (product_id, name, f"{category} model {product_id}", price,
+               f"/static/products/{product_id}.jpg", rng.randint(0, 500))
+
+def allocate(count, weights):
+    """Split count into whole numbers proportional to weights, summing to count"""
+    total = sum(weights)
+    allocated = []
+    carry = 0.0
+    for weight in weights:
+        exact = count * weight / total + carry
+        whole = int(exact)
+        carry = exact - whole
+        allocated.append(whole)
+    allocated[-1] += count - sum(allocated)
+    return allocated
+
+def generate_order_dates(rng, count, days, end_date, growth):
+    """Yield count order timestamps in ascending order"""
+    start_date = end_date - timedelta(days=days)
+    hour_cum_weights = list(itertools.accumulate(HOUR_WEIGHTS))
+    # Volume grows over the period and peaks at weekends
+    day_weights = [math.exp(growth * day / max(days - 1, 1)) *
+                   WEEKDAY_WEIGHTS[(start_date + timedelta(days=day)).weekday()]
+                   for day in range(days)]
+
+    for day, day_count in enumerate(allocate(count, day_weights)):
+        day_start = start_date + timedelta(days=day)
+        hours = rng.choices(range(24), cum_weights=hour_cum_weights, k=day_count)
+        seconds = sorted(hour * 3600 + rng.randrange(3600) for hour in hours)
+        for second in seconds:
+            yield (day_start + timedelta(seconds=second)).strftime('%Y-%m-%d %H:%M:%S')
+
+def generate(db_path='ecommerce.db', products=10000, orders=100000, items_per_order=3.0,
+             customers=None, days=365, end_date=None, zipf_s=1.1, growth=1.0, seed=42,
+             force=False, snapshot_path=None, progress=print):
+    """Bulk-load a fresh database and return row counts and timings"""
+    if os.path.exists(db_path):
+        if not force:
+            raise FileExistsError(f"{db_path} already exists, pass force=True to replace it")
+        os.remove(db_path)
+
+    start_time = time.time()
+    rng = random.Random(seed)
+    customers = customers or max(orders // 4, 1)
+    end_date = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    # Durability is pointless for a throwaway load, trade it for speed
+    cursor.execute('PRAGMA journal_mode = OFF').fetchall()
+    cursor.execute('PRAGMA synchronous = OFF')
+    cursor.execute('PRAGMA locking_mode = EXCLUSIVE').fetchall()
+    cursor.execute('PRAGMA temp_store = MEMORY')
+    cursor.execute('PRAGMA cache_size = -262144')
+    create_schema(cursor)
+
+    # (price, name, description) indexed by product id, snapshotted into order items
+    catalog = [None]
+    for batch in _batched(generate_products(rng, products)):
+        catalog.extend((row[3], row[1], row[2]) for row in batch)
+        cursor.executemany('INSERT INTO products (id, name, description, price, image_url, stock) VALUES (?, ?, ?, ?, ?, ?)', batch)
+    conn.commit()
+    progress(f"   {products} products")
+
+    # Zipf ranks are shuffled so popularity does not follow product id
+    popularity = list(range(1, products + 1))
+    rng.shuffle(popularity)
+    product_cum_weights = zipf_cum_weights(products, zipf_s)
+    customer_cum_weights = zipf_cum_weights(customers, 0.6)
+    mean_extra_items = items_per_order - 1
+
+    order_id = 0
+    items_count = 0
+    for dates in _batched(generate_order_dates(rng, orders, days, end_date, growth)):
+        # Draw every random choice for the batch in a few large calls
+        item_counts = [min(1 + int(rng.expovariate(1.0 / mean_extra_items)), products) if mean_extra_items > 0 else 1
+                       for _ in dates]
+        picks = iter(rng.choices(popularity, cum_weights=product_cum_weights, k=sum(item_counts)))
+        customer_ids = rng.choices(range(customers), cum_weights=customer_cum_weights, k=len(dates))
+
+        order_rows = []
+        item_rows = []
+        for order_date, item_count, customer in zip(dates, item_counts, customer_ids):
+            order_id += 1
+            total = 0.0
+            chosen = set()
+            for product_id in itertools.islice(picks, item_count):
+                if product_id in chosen:
+                    continue
+                chosen.add(product_id)
+                quantity = 1 if rng.random() < 0.8 else rng.randint(2, 5)
+                price, name, description = catalog[product_id]
+                total += price * quantity
+                item_rows.append((order_id, product_id, quantity, price, name, description))
+
+            first_name = FIRST_NAMES[customer % len(FIRST_NAMES)]
+            last_name = LAST_NAMES[(customer // len(FIRST_NAMES)) % len(LAST_NAMES)]
+            order_rows.append((order_id, f"{first_name} {last_name}", f"customer{customer}@example.com",
+                               round(total, 2), order_date))
+
+        cursor.executemany('INSERT INTO orders (id, customer_name, customer_email, total_amount, order_date) VALUES (?, ?, ?, ?, ?)', order_rows)
+        cursor.executemany('INSERT INTO order_items (order_id, product_id, quantity, price, product_name, product_description) VALUES (?, ?, ?, ?, ?, ?)', item_rows)
+        items_count += len(item_rows)
+        if order_id % (BATCH_SIZE * 20) == 0:
+            conn.commit()
+            progress(f"   {order_id} orders, {items_count} items")
+
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    conn.commit()
+    cursor.execute('PRAGMA journal_mode = DELETE').fetchall()
+    cursor.close()
+    conn.close()
+
+    if snapshot_path:
+        build_snapshot(db_path, snapshot_path)
+
+    duration = time.time() - start_time
+    rows = products + orders + items_count
+    return {
+        'products': products,
+        'orders': orders,
+        'order_items': items_count,
+        'duration_s': round(duration, 2),
+        'rows_per_second': round(rows / duration, 1) if duration > 0 else rows
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='ecommerce.db')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--items-per-order', type=float, default=3.0, help='Mean line items drawn per order (repeat picks are merged)')
+    parser.add_argument('--customers', type=int, help='Distinct customers (default: orders / 4)')
+    parser.add_argument('--days', type=int, default=365, help='Days of order history')
+    parser.add_argument('--end-date', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        help='Last day of order history, YYYY-MM-DD (default: today)')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for product popularity')
+    parser.add_argument('--growth', type=float, default=1.0, help='Exponential growth of order volume over the period')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='Replace an existing database')
+    parser.add_argument('--snapshot', help='Catalog snapshot to publish for the new products '
+                                           '(default: the live snapshot when --db is the app database)')
+    args = parser.parse_args()
+
+    print(f"🚀 Generating {args.db} (seed {args.seed})")
+    try:
+        stats = generate(args.db, args.products, args.orders, args.items_per_order, args.customers, args.days,
+                         args.end_date, args.zipf, args.growth, args.seed, args.force,
+                         args.snapshot or default_snapshot_path(args.db))
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    print(f"✅ {stats['products']} products, {stats['orders']} orders, {stats['order_items']} order items "
+          f"in {stats['duration_s']}s ({stats['rows_per_second']} rows/s)")
+
+if __name__ == "__main__":
+    main()
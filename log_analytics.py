@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Streaming analytics over the application's Performance and User Action logs
+
+Reads logs/ecommerce.log and its rotated backups (oldest first) one line at a
+time and parses only the `Performance:` and `User Action:` records. Latencies
+go into log-scaled histograms, so percentiles need constant memory however
+large the logs are. With --state the aggregates and per-file read offsets are
+saved, and the next run only reads what was appended or rotated since.
+
+Usage:
+    python log_analytics.py
+    python log_analytics.py --log-dir /var/log/ecommerce --state analytics.json --json
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import math
+import os
+from datetime import datetime
+
+PERFORMANCE_MARKER = b'Performance: '
+USER_ACTION_MARKER = b'User Action: '
+# Records are logged at INFO, so their message starts right after this
+MESSAGE_SEPARATOR = b' - INFO - '
+
+# Histogram buckets grow by 2%, so percentiles are within 1% of the exact value
+HISTOGRAM_GAMMA = 1.02
+PERCENTILES = (50, 90, 95, 99)
+
+DEFAULT_TOP = 10
+DEFAULT_BUCKET_SECONDS = 60
+DEFAULT_KEEP_BUCKETS = 1440
+
+# Funnel stages in order, and the user actions that count towards each
+FUNNEL_STAGES = (
+    ('browse', ('get_products', 'get_product')),
+    ('add_to_cart', ('add_new_cart_item', 'increment_cart_item', 'update_cart_items')),
+    ('view_cart', ('get_cart',)),
+    ('checkout_attempt', ('create_order', 'create_order_empty_cart')),
+    ('order', ('create_order',))
+)
+
+def log_files(log_dir, name='ecommerce.log'):
+    """Return the current log and its rotated backups, oldest first"""
+    base = os.path.join(log_dir, name)
+    backups = []
+    for path in glob.glob(glob.escape(base) + '.*'):
+        suffix = path[len(base) + 1:]
+        if suffix.isdigit():
+            backups.append((int(suffix), path))
+    # RotatingFileHandler shifts older records to higher numbers
+    files = [path for _, path in sorted(backups, reverse=True)]
+    if os.path.exists(base):
+        files.append(base)
+    return files
+
+def _bucket(duration_ms):
+    # Bucketed in microseconds so sub-millisecond requests still resolve
+    duration_us = duration_ms * 1000
+    if duration_us < 1:
+        return 0
+    return max(math.ceil(math.log(duration_us) / math.log(HISTOGRAM_GAMMA)), 1)
+
+def _bucket_value(index):
+    """Midpoint of a bucket's range in milliseconds"""
+    if index == 0:
+        return 0.0
+    return HISTOGRAM_GAMMA ** (index - 0.5) / 1000
+
+class LogStats:
+    """Aggregates that stay the same size however many lines are fed"""
+
+    def __init__(self, top=DEFAULT_TOP, bucket_seconds=DEFAULT_BUCKET_SECONDS, keep_buckets=DEFAULT_KEEP_BUCKETS):
+        self.top = top
+        self.bucket_seconds = bucket_seconds
+        self.keep_buckets = keep_buckets
+        self.lines = 0
+        self.parse_errors = 0
+        self.operations = {}
+        self.slowest = []
+        self.throughput = {}
+        self.actions = {}
+
+    def add_performance(self, record):
+        operation = record.get('operation', 'unknown')
+        duration_ms = float(record.get('duration_ms', 0))
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'histogram': {}}
+        stats['count'] += 1
+        stats['total_ms'] += duration_ms
+        stats['max_ms'] = max(stats['max_ms'], duration_ms)
+        bucket = _bucket(duration_ms)
+        stats['histogram'][bucket] = stats['histogram'].get(bucket, 0) + 1
+
+        # Min-heap of the slowest entries seen so far, details kept as JSON so entries always compare
+        details = {key: value for key, value in record.items() if key not in ('operation', 'duration_ms', 'timestamp')}
+        entry = (duration_ms, record.get('timestamp', ''), operation, json.dumps(details, sort_keys=True))
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, entry)
+        elif duration_ms > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+        timestamp = record.get('timestamp')
+        if timestamp:
+            try:
+                started = datetime.fromisoformat(timestamp).timestamp()
+            except ValueError:
+                return
+            bucket_start = int(started // self.bucket_seconds * self.bucket_seconds)
+            self.throughput[bucket_start] = self.throughput.get(bucket_start, 0) + 1
+            if len(self.throughput) > self.keep_buckets:
+                del self.throughput[min(self.throughput)]
+
+    def add_user_action(self, record):
+        action = record.get('action', 'unknown')
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+    def feed(self, line):
+        """Parse one raw log line, ignoring anything but the two record types"""
+        separator = line.find(MESSAGE_SEPARATOR)
+        if separator == -1:
+            return
+        # Only a marker at the start of the message counts, not one inside logged user data
+        message_start = separator + len(MESSAGE_SEPARATOR)
+        for marker, add in ((PERFORMANCE_MARKER, self.add_performance), (USER_ACTION_MARKER, self.add_user_action)):
+            if line.startswith(marker, message_start):
+                self.lines += 1
+                try:
+                    record = json.loads(line[message_start + len(marker):])
+                    if not isinstance(record, dict):
+                        raise ValueError("record is not an object")
+                    add(record)
+                except (ValueError, TypeError):
+                    self.parse_errors += 1
+                return
+
+    def percentiles(self, operation):
+        stats = self.operations[operation]
+        results = {}
+        buckets = sorted(stats['histogram'].items())
+        for percentile in PERCENTILES:
+            rank = math.ceil(stats['count'] * percentile / 100)
+            seen = 0
+            for bucket, count in buckets:
+                seen += count
+                if seen >= rank:
+                    results[f'p{percentile}'] = round(min(_bucket_value(bucket), stats['max_ms']), 2)
+                    break
+        return results
+
+    def funnel(self):
+        stages = []
+        previous = None
+        for stage, actions in FUNNEL_STAGES:
+            count = sum(self.actions.get(action, 0) for action in actions)
+            stages.append({
+                'stage': stage,
+                'events': count,
+                'conversion': round(count / previous, 4) if previous else None
+            })
+            previous = count
+        return stages
+
+    def report(self):
+        operations = {}
+        for operation, stats in sorted(self.operations.items(), key=lambda item: -item[1]['count']):
+            operations[operation] = dict(
+                count=stats['count'],
+                mean_ms=round(stats['total_ms'] / stats['count'], 2),
+                max_ms=stats['max_ms'],
+                **self.percentiles(operation)
+            )
+        return {
+            'records': self.lines,
+            'parse_errors': self.parse_errors,
+            'operations': operations,
+            'slowest': [
+                {'operation': operation, 'duration_ms': duration_ms, 'timestamp': timestamp, 'details': json.loads(details)}
+                for duration_ms, timestamp, operation, details in sorted(self.slowest, key=lambda entry: -entry[0])
+            ],
+            'throughput': {
+                'bucket_seconds': self.bucket_seconds,
+                'buckets': [
+                    {'start': datetime.fromtimestamp(start).isoformat(), 'requests': count}
+                    for start, count in sorted(self.throughput.items())
+                ]
+            },
+            'actions': dict(sorted(self.actions.items(), key=lambda item: -item[1])),
+            'funnel': self.funnel()
+        }
+
+    def to_state(self):
+        return {
+            'top': self.top,
+            'bucket_seconds': self.bucket_seconds,
+            'keep_buckets': self.keep_buckets,
+            'lines': self.lines,
+            'parse_errors': self.parse_errors,
+            'operations': self.operations,
+            'slowest': self.slowest,
+            'throughput': self.throughput,
+            'actions': self.actions
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(state['top'], state['bucket_seconds'], state['keep_buckets'])
+        stats.lines = state['lines']
+        stats.parse_errors = state['parse_errors']
+        # JSON turns integer keys into strings
+        stats.operations = {
+            operation: dict(values, histogram={int(bucket): count for bucket, count in values['histogram'].items()})
+            for operation, values in state['operations'].items()
+        }
+        stats.slowest = [tuple(entry) for entry in state['slowest']]
+        heapq.heapify(stats.slowest)
+        stats.throughput = {int(start): count for start, count in state['throughput'].items()}
+        stats.actions = state['actions']
+        return stats
+
+def scan(files, stats, offsets=None):
+    """Feed every complete line not yet read into stats.
+
+    offsets maps a file identity (device and inode, which survive rotation
+    renames) to the byte offset already consumed. Returns the updated map for
+    the files that still exist.
+    """
+    offsets = offsets or {}
+    updated = {}
+    for path in files:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            # Rotated away between listing and opening
+            continue
+        with f:
+            stat = os.fstat(f.fileno())
+            identity = f'{stat.st_dev}:{stat.st_ino}'
+            offset = offsets.get(identity, 0)
+            if offset > stat.st_size:
+                # Truncated or a reused inode, start over
+                offset = 0
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Still being written, picked up by the next run
+                    break
+                offset += len(line)
+                stats.feed(line)
+            updated[identity] = offset
+    return updated
+
+def load_state(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(path, stats, offsets):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'offsets': offsets, 'stats': stats.to_state()}, f)
+    os.replace(tmp_path, path)
+
+def analyze(log_dir='logs', state_path=None, top=DEFAULT_TOP, bucket_seconds=DEFAULT_BUCKET_SECONDS,
+            keep_buckets=DEFAULT_KEEP_BUCKETS):
+    """Scan the logs (resuming from state_path if given) and return the report"""
+    state = load_state(state_path)
+    if state and state['stats']['bucket_seconds'] == bucket_seconds:
+        stats = LogStats.from_state(state['stats'])
+        stats.top = top
+        stats.keep_buckets = keep_buckets
+        offsets = state['offsets']
+    else:
+        stats = LogStats(top, bucket_seconds, keep_buckets)
+        offsets = {}
+
+    offsets = scan(log_files(log_dir), stats, offsets)
+    if state_path:
+        save_state(state_path, stats, offsets)
+    return stats.report()
+
+def _print_report(report, buckets_shown):
+    print(f"📊 {report['records']} records ({report['parse_errors']} unparseable)")
+
+    print("\n⏱️  Latency by operation (ms)")
+    print(f"   {'operation':<28}{'count':>9}{'mean':>10}" + ''.join(f"{'p' + str(p):>10}" for p in PERCENTILES) + f"{'max':>10}")
+    for operation, stats in report['operations'].items():
+        print(f"   {operation:<28}{stats['count']:>9}{stats['mean_ms']:>10}"
+              + ''.join(f"{stats.get('p' + str(p), ''):>10}" for p in PERCENTILES) + f"{stats['max_ms']:>10}")
+
+    print("\n🐢 Slowest requests")
+    for entry in report['slowest']:
+        print(f"   {entry['duration_ms']:>10} ms  {entry['operation']:<24} {entry['timestamp']}  {json.dumps(entry['details'])}")
+
+    buckets = report['throughput']['buckets'][-buckets_shown:]
+    print(f"\n📈 Throughput per {report['throughput']['bucket_seconds']}s (last {len(buckets)} buckets)")
+    peak = max((bucket['requests'] for bucket in buckets), default=0)
+    for bucket in buckets:
+        bar = '█' * max(round(bucket['requests'] / peak * 40), 1) if peak else ''
+        print(f"   {bucket['start']}  {bucket['requests']:>7}  {bar}")
+
+    print("\n🛒 Funnel")
+    for stage in report['funnel']:
+        conversion = f"{stage['conversion'] * 100:.1f}%" if stage['conversion'] is not None else ''
+        print(f"   {stage['stage']:<20}{stage['events']:>9}  {conversion}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--log-dir', default='logs')
+    parser.add_argument('--state', help='Save aggregates and offsets here and resume from them on the next run')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='Slowest requests to keep')
+    parser.add_argument('--bucket', type=int, default=DEFAULT_BUCKET_SECONDS, help='Throughput bucket size in seconds')
+    parser.add_argument('--keep-buckets', type=int, default=DEFAULT_KEEP_BUCKETS, help='Throughput buckets to retain')
+    parser.add_argument('--show-buckets', type=int, default=30, help='Throughput buckets to print')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = analyze(args.log_dir, args.state, args.top, args.bucket, args.keep_buckets)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report, args.show_buckets)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Compact row models for the e-commerce tables.
+
+Each model is a __slots__ record built straight from a cursor row (set
+``cursor.row_factory = Model.from_row`` and select ``Model.COLUMNS``) and
+serialized by an encoder compiled once per type, so list endpoints never build
+an intermediate dict per row.
+"""
+
+from json.encoder import encode_basestring_ascii
+
+# How each field kind is written: a %-format placeholder and the expression
+# producing its argument from the record `o`
+_FIELD_KINDS = {
+    'int': ('%s', 'o.{name}'),
+    'float': ('%r', 'o.{name}'),
+    'str': ('%s', '_str(o.{name})'),
+    'int?': ('%s', "(o.{name} if o.{name} is not None else 'null')"),
+    'float?': ('%s', "(o.{name} if o.{name} is not None else 'null')"),
+    'str?': ('%s', "(_str(o.{name}) if o.{name} is not None else 'null')")
+}
+
+def compile_encoder(fields):
+    """Compile an encoder for a list of (field name, kind) pairs.
+
+    The generated function formats a record with a single %-template, which
+    keeps per-row work to one string operation plus escaping of text fields.
+    Returns (encode_one, encode_many).
+    """
+    placeholders = []
+    arguments = []
+    for name, kind in fields:
+        placeholder, argument = _FIELD_KINDS[kind]
+        placeholders.append(encode_basestring_ascii(name) + ':' + placeholder)
+        arguments.append(argument.format(name=name))
+    template = '{' + ','.join(placeholders) + '}'
+    row = '%r %% (%s,)' % (template, ', '.join(arguments))
+    source = (
+        f"def encode_one(o):\n"
+        f"    return {row}\n"
+        f"def encode_many(objects):\n"
+        f"    return '[' + ','.join([{row} for o in objects]) + ']'\n"
+    )
+    namespace = {'_str': encode_basestring_ascii}
+    exec(source, namespace)
+    return namespace['encode_one'], namespace['encode_many']
+
+class Product:
+    __slots__ = ('id', 'name', 'description', 'price', 'image_url', 'stock')
+    COLUMNS = 'id, name, description, price, image_url, stock'
+    FIELDS = (('id', 'int'), ('name', 'str'), ('description', 'str?'), ('price', 'float'),
+              ('image_url', 'str?'), ('stock', 'int?'))
+
+    def __init__(self, id, name, description, price, image_url, stock):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.price = price
+        self.image_url = image_url
+        self.stock = stock
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class Order:
+    __slots__ = ('id', 'customer_name', 'customer_email', 'total_amount', 'order_date')
+    COLUMNS = 'id, customer_name, customer_email, total_amount, order_date'
+    FIELDS = (('id', 'int'), ('customer_name', 'str'), ('customer_email', 'str'),
+              ('total_amount', 'float'), ('order_date', 'str?'))
+
+    def __init__(self, id, customer_name, customer_email, total_amount, order_date):
+        self.id = id
+        self.customer_name = customer_name
+        self.customer_email = customer_email
+        self.total_amount = total_amount
+        self.order_date = order_date
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+class OrderItem:
+    __slots__ = ('product_id', 'name', 'description', 'quantity', 'price')
+    COLUMNS = 'product_id, product_name, product_description, quantity, price'
+    FIELDS = (('product_id', 'int'), ('name', 'str?'), ('description', 'str?'), ('quantity', 'int?'),
+              ('price', 'float?'), ('total', 'float?'))
+
+    def __init__(self, product_id, name, description, quantity, price):
+        self.product_id = product_id
+        self.name = name
+        self.description = description
+        self.quantity = quantity
+        self.price = price
+
+    @property
+    def total(self):
+        return self.quantity * self.price
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+encode_product, encode_products = compile_encoder(Product.FIELDS)
+encode_order, encode_orders = compile_encoder(Order.FIELDS)
+encode_order_item, encode_order_items = compile_encoder(OrderItem.FIELDS)
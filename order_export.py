@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Streaming export of orders with their line items (CSV or NDJSON)
+
+Rows come from a single ordered join over orders and order_items and are
+formatted as the cursor is read, so memory stays constant however many orders
+are exported. CSV has one row per line item; NDJSON has one object per order,
+shaped like GET /api/orders/<id>. Archived orders are merged in by date.
+
+Usage:
+    python order_export.py --from 2025-01-01 --to 2025-01-31 --format csv > january.csv
+    python order_export.py --from 2025-01-01 --gzip > orders.ndjson.gz
+"""
+
+import argparse
+import csv
+import heapq
+import io
+import os
+import sqlite3
+import sys
+import zlib
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from models import Order, OrderItem, encode_order, encode_order_items
+
+FORMATS = ('csv', 'ndjson')
+CSV_COLUMNS = ('order_id', 'order_date', 'customer_name', 'customer_email', 'total_amount',
+               'product_id', 'product_name', 'product_description', 'quantity', 'price')
+DEFAULT_CHUNK_SIZE = 1000
+
+# Bounds that sort before and after any order_date
+MIN_DATE = '0000-00-00 00:00:00'
+MAX_DATE = '9999-12-31 23:59:59'
+
+EXPORT_SQL = '''
+    SELECT o.id, o.order_date, o.customer_name, o.customer_email, o.total_amount,
+           oi.product_id, oi.product_name, oi.product_description, oi.quantity, oi.price
+    FROM {schema}.orders o
+    LEFT JOIN {schema}.order_items oi ON oi.order_id = o.id
+    WHERE o.order_date >= ? AND o.order_date < ?
+    ORDER BY o.order_date, o.id, oi.id
+'''
+
+def parse_date_bound(value, end=False):
+    """Turn a YYYY-MM-DD date or ISO timestamp into an order_date bound.
+
+    Both ends of a range are inclusive, so an end bound is moved just past
+    the given day (or second) and compared exclusively.
+    """
+    parsed = datetime.fromisoformat(value)
+    if end:
+        parsed += timedelta(days=1) if len(value) == 10 else timedelta(seconds=1)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+def _fetch_rows(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+def iter_order_rows(date_from, date_to, db_path='ecommerce.db', archive_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one row per order item (in CSV_COLUMNS order), oldest order first.
+
+    Orders without items yield a single row with empty item columns.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        params = (date_from, date_to)
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_SQL.format(schema='main'), params)
+        if archive_path and os.path.exists(archive_path):
+            conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+            archive_cursor = conn.cursor()
+            archive_cursor.execute(EXPORT_SQL.format(schema='archive'), params)
+            # An order lives in exactly one database, so rows never interleave within an order
+            yield from heapq.merge(_fetch_rows(archive_cursor, chunk_size), _fetch_rows(cursor, chunk_size),
+                                   key=lambda row: (row[1], row[0]))
+        else:
+            yield from _fetch_rows(cursor, chunk_size)
+    finally:
+        conn.close()
+
+def format_rows(rows, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield text chunks of about chunk_size rows (or orders) from order rows"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        pending = 0
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue()
+        return
+
+    lines = []
+    for order_id, order_rows in groupby(rows, key=lambda row: row[0]):
+        first = next(order_rows)
+        order = Order(order_id, first[2], first[3], first[4], first[1])
+        items = [OrderItem(*row[5:]) for row in (first, *order_rows) if row[5] is not None]
+        lines.append(encode_order(order)[:-1] + ',"items":' + encode_order_items(items) + '}\n')
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_orders(fmt='csv', date_from=MIN_DATE, date_to=MAX_DATE, db_path='ecommerce.db', archive_path=None,
+                  shards=None, compress=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield orders placed in [date_from, date_to) with their items as CSV or NDJSON.
+
+    With a ShardedOrderStore the shards are read instead of db_path. Chunks
+    are text, or gzip bytes when compress is set.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    if shards:
+        rows = shards.iter_order_rows(date_from, date_to, chunk_size)
+    else:
+        rows = iter_order_rows(date_from, date_to, db_path, archive_path, chunk_size)
+    chunks = format_rows(rows, fmt, chunk_size)
+    return gzip_chunks(chunks) if compress else chunks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--from', dest='date_from', help='First day or timestamp to export (inclusive)')
+    parser.add_argument('--to', dest='date_to', help='Last day or timestamp to export (inclusive)')
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+    parser.add_argument('--db', default='ecommerce.db')
+    parser.add_argument('--archive', default=os.environ.get('ARCHIVE_DB_PATH', 'ecommerce_archive.db'))
+    args = parser.parse_args()
+
+    try:
+        date_from = parse_date_bound(args.date_from) if args.date_from else MIN_DATE
+        date_to = parse_date_bound(args.date_to, end=True) if args.date_to else MAX_DATE
+    except ValueError as e:
+        print(f"❌ Invalid date: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    output = sys.stdout.buffer
+    for chunk in export_orders(args.format, date_from, date_to, args.db, args.archive, compress=args.gzip):
+        output.write(chunk if args.gzip else chunk.encode('utf-8'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Sharded order storage across several SQLite files.
+
+Each shard is its own database file with its own write lock, so concurrent
+checkouts that land on different shards commit in parallel. Orders are placed
+by a stable hash of the customer email (keeping a customer's orders together)
+or round-robin by order.
+
+Order ids are globally unique without coordination: the low SHARD_BITS bits
+hold the shard number and the rest hold the shard-local AUTOINCREMENT id, so
+any order id routes straight to its owning shard.
+"""
+
+import heapq
+import itertools
+import os
+import sqlite3
+import zlib
+
+from models import Order
+
+SHARD_BITS = 8
+MAX_SHARDS = 1 << SHARD_BITS
+SHARD_KEYS = ('customer', 'order')
+DEFAULT_TIMEOUT = 30  # seconds to wait for a locked shard
+
+class ShardedOrderStore:
+    """Orders and order items spread over shard_count database files"""
+
+    def __init__(self, directory, shard_count, shard_key='customer'):
+        if not 1 <= shard_count <= MAX_SHARDS:
+            raise ValueError(f"shard_count must be between 1 and {MAX_SHARDS}")
+        if shard_key not in SHARD_KEYS:
+            raise ValueError(f"shard_key must be one of {', '.join(SHARD_KEYS)}")
+        self.directory = directory
+        self.shard_count = shard_count
+        self.shard_key = shard_key
+        self._round_robin = itertools.count()
+
+    def shard_path(self, shard):
+        return os.path.join(self.directory, f'orders_shard_{shard}.db')
+
+    def connect(self, shard, timeout=DEFAULT_TIMEOUT):
+        return sqlite3.connect(self.shard_path(shard), timeout=timeout)
+
+    def init(self):
+        """Create the shard files and their tables"""
+        os.makedirs(self.directory, exist_ok=True)
+        for shard in range(self.shard_count):
+            conn = self.connect(shard)
+            try:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS orders (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        customer_name TEXT NOT NULL,
+                        customer_email TEXT NOT NULL,
+                        total_amount REAL NOT NULL,
+                        order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS order_items (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        order_id INTEGER,
+                        product_id INTEGER,
+                        quantity INTEGER,
+                        price REAL,
+                        product_name TEXT,
+                        product_description TEXT,
+                        FOREIGN KEY (order_id) REFERENCES orders (id)
+                    )
+                ''')
+                # Shards created before product snapshots get the columns added
+                columns = {row[1] for row in conn.execute('PRAGMA table_info(order_items)').fetchall()}
+                for column in ('product_name', 'product_description'):
+                    if column not in columns:
+                        conn.execute(f'ALTER TABLE order_items ADD COLUMN {column} TEXT')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders (order_date)')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)')
+                conn.commit()
+            finally:
+                conn.close()
+
+    @staticmethod
+    def global_id(shard, local_id):
+        return (local_id << SHARD_BITS) | shard
+
+    @staticmethod
+    def split_id(order_id):
+        """Return (shard, local id) for a global order id"""
+        return order_id & (MAX_SHARDS - 1), order_id >> SHARD_BITS
+
+    def shard_for(self, customer_email):
+        if self.shard_key == 'customer':
+            # crc32 is stable across processes, unlike hash()
+            return zlib.crc32(customer_email.lower().encode('utf-8')) % self.shard_count
+        return next(self._round_robin) % self.shard_count
+
+    def insert_order(self, customer_name, customer_email, total, cart_items, timeout=DEFAULT_TIMEOUT):
+        """Write an order to its shard in one transaction, returning the global id"""
+        shard = self.shard_for(customer_email)
+        conn = self.connect(shard, timeout)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('INSERT INTO orders (customer_name, customer_email, total_amount) VALUES (?, ?, ?)',
+                           (customer_name, customer_email, total))
+            local_id = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO order_items (order_id, product_id, quantity, price, product_name, product_description)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(local_id, item['product_id'], item['quantity'], item['price'], item.get('name'), item.get('description'))
+                  for item in cart_items])
+            conn.commit()
+        finally:
+            conn.close()
+        return self.global_id(shard, local_id)
+
+    def get_order(self, order_id, timeout=DEFAULT_TIMEOUT):
+        """Return (Order, [(product_id, name, description, quantity, price)]) from the owning shard, or None"""
+        shard, local_id = self.split_id(order_id)
+        if shard >= self.shard_count:
+            return None
+        conn = self.connect(shard, timeout)
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = Order.from_row
+            cursor.execute('''
+                SELECT (id << ?) | ?, customer_name, customer_email, total_amount, order_date
+                FROM orders WHERE id = ?
+            ''', (SHARD_BITS, shard, local_id))
+            order = cursor.fetchone()
+            if order is None:
+                return None
+            cursor.row_factory = None
+            cursor.execute('''
+                SELECT product_id, product_name, product_description, quantity, price
+                FROM order_items WHERE order_id = ? ORDER BY id
+            ''', (local_id,))
+            return order, cursor.fetchall()
+        finally:
+            conn.close()
+
+    def _iter_shard(self, shard, chunk_size=1000, timeout=DEFAULT_TIMEOUT):
+        conn = self.connect(shard, timeout)
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = Order.from_row
+            cursor.execute('''
+                SELECT (id << ?) | ?, customer_name, customer_email, total_amount, order_date
+                FROM orders ORDER BY order_date DESC, id DESC
+            ''', (SHARD_BITS, shard))
+            while True:
+                orders = cursor.fetchmany(chunk_size)
+                if not orders:
+                    break
+                yield from orders
+        finally:
+            conn.close()
+
+    def iter_orders(self, timeout=DEFAULT_TIMEOUT):
+        """Yield every order, newest first, merge-sorting the per-shard cursors"""
+        return heapq.merge(*(self._iter_shard(shard, timeout=timeout) for shard in range(self.shard_count)),
+                           key=lambda order: order.order_date, reverse=True)
+
+    def _iter_shard_rows(self, shard, date_from, date_to, chunk_size):
+        conn = self.connect(shard)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT (o.id << ?) | ?, o.order_date, o.customer_name, o.customer_email, o.total_amount,
+                       oi.product_id, oi.product_name, oi.product_description, oi.quantity, oi.price
+                FROM orders o
+                LEFT JOIN order_items oi ON oi.order_id = o.id
+                WHERE o.order_date >= ? AND o.order_date < ?
+                ORDER BY o.order_date, o.id, oi.id
+            ''', (SHARD_BITS, shard, date_from, date_to))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def iter_order_rows(self, date_from, date_to, chunk_size=1000):
+        """Yield one row per order item placed in [date_from, date_to), oldest first.
+
+        Rows are (order_id, order_date, customer_name, customer_email,
+        total_amount, product_id, product_name, product_description, quantity,
+        price), with the item columns NULL for an order without items.
+        """
+        return heapq.merge(*(self._iter_shard_rows(shard, date_from, date_to, chunk_size)
+                             for shard in range(self.shard_count)),
+                           key=lambda row: (row[1], row[0]))
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Streaming bulk import and export of the product catalog (NDJSON or CSV)
+
+Import parses its input one line at a time and upserts rows in chunked
+executemany transactions; export streams rows straight from a cursor. Neither
+holds the full catalog in memory.
+
+Usage:
+    python product_io.py import catalog.ndjson
+    python product_io.py import catalog.csv --format csv
+    python product_io.py export --format csv > catalog.csv
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import sqlite3
+import sys
+import time
+
+from catalog_snapshot import build_snapshot, default_snapshot_path
+from models import Product, encode_product
+
+FORMATS = ('ndjson', 'csv')
+CSV_COLUMNS = ('id', 'name', 'description', 'price', 'image_url', 'stock')
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+UPSERT_SQL = '''
+    INSERT INTO products (id, name, description, price, image_url, stock) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name = excluded.name,
+        description = excluded.description,
+        price = excluded.price,
+        image_url = excluded.image_url,
+        stock = excluded.stock
+'''
+INSERT_SQL = 'INSERT INTO products (name, description, price, image_url, stock) VALUES (?, ?, ?, ?, ?)'
+
+def _decode_lines(lines, errors):
+    """Decode UTF-8 byte lines, recording undecodable ones in errors as (line number, message)"""
+    for line_number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8')
+            except UnicodeDecodeError as e:
+                errors.append((line_number, f"invalid UTF-8: {e}"))
+                # A blank line is skipped by both parsers
+                line = '\n'
+        yield line
+
+def _decode_errors(errors):
+    while errors:
+        line_number, error = errors.pop(0)
+        yield line_number, None, error
+
+def _parse_records(lines, fmt):
+    """Yield (line number, record dict, parse error) from an iterable of text or UTF-8 byte lines"""
+    errors = []
+    lines = _decode_lines(lines, errors)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            for record in reader:
+                yield from _decode_errors(errors)
+                yield reader.line_num, record, None
+        except csv.Error as e:
+            # The rest of a malformed CSV stream cannot be trusted
+            yield reader.line_num, None, str(e)
+        yield from _decode_errors(errors)
+        return
+    for line_number, line in enumerate(lines, 1):
+        yield from _decode_errors(errors)
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, str(e)
+
+def _optional_text(record, field):
+    value = record.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value or None
+
+def _optional_int(record, field):
+    value = record.get(field)
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{field} must be an integer")
+    return int(value)
+
+def _record_params(record):
+    """Convert a parsed record into (id, name, description, price, image_url, stock)"""
+    if not isinstance(record, dict):
+        raise ValueError("record must be an object")
+    name = _optional_text(record, 'name')
+    if not name:
+        raise ValueError("name is required")
+    price = record.get('price')
+    if price in (None, ''):
+        raise ValueError("price is required")
+    if isinstance(price, bool) or not isinstance(price, (int, float, str)):
+        raise ValueError("price must be a number")
+    price = float(price)
+    # NaN and infinity would break the JSON served by the product endpoints
+    if not math.isfinite(price):
+        raise ValueError("price must be a finite number")
+    stock = _optional_int(record, 'stock')
+    return (
+        _optional_int(record, 'id'),
+        name,
+        _optional_text(record, 'description'),
+        price,
+        _optional_text(record, 'image_url'),
+        stock if stock is not None else 0
+    )
+
+def _write_chunk(conn, upserts, inserts):
+    with conn:
+        if upserts:
+            conn.executemany(UPSERT_SQL, upserts)
+        if inserts:
+            conn.executemany(INSERT_SQL, inserts)
+
+def import_products(lines, fmt='ndjson', db_path='ecommerce.db', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Upsert products from an iterable of NDJSON or CSV lines (text or UTF-8 bytes).
+
+    Rows with an id replace the existing product, rows without one are added.
+    Invalid rows are skipped and reported. Returns import statistics.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    start_time = time.time()
+    rows = 0
+    errors = []
+    error_count = 0
+    upserts = []
+    inserts = []
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for line_number, record, error in _parse_records(lines, fmt):
+            if error is None:
+                try:
+                    params = _record_params(record)
+                except (TypeError, ValueError) as e:
+                    error = str(e)
+            if error is not None:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line_number, 'error': error})
+                continue
+
+            if params[0] is None:
+                inserts.append(params[1:])
+            else:
+                upserts.append(params)
+            rows += 1
+
+            if len(upserts) + len(inserts) >= chunk_size:
+                _write_chunk(conn, upserts, inserts)
+                upserts = []
+                inserts = []
+
+        _write_chunk(conn, upserts, inserts)
+    finally:
+        conn.close()
+
+    duration = time.time() - start_time
+    return {
+        'rows': rows,
+        'errors_count': error_count,
+        'errors': errors,
+        'duration_ms': round(duration * 1000, 2),
+        'rows_per_second': round(rows / duration, 1) if duration > 0 else rows
+    }
+
+def export_products(fmt='ndjson', db_path='ecommerce.db', chunk_size=1000):
+    """Yield the catalog as NDJSON or CSV text chunks, ordered by id"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = Product.from_row
+        cursor.execute(f'SELECT {Product.COLUMNS} FROM products ORDER BY id')
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(CSV_COLUMNS)
+            yield buffer.getvalue()
+
+        while True:
+            products = cursor.fetchmany(chunk_size)
+            if not products:
+                break
+            if fmt == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([getattr(product, column) for column in CSV_COLUMNS] for product in products)
+                yield buffer.getvalue()
+            else:
+                yield ''.join([encode_product(product) + '\n' for product in products])
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Upsert products from a file ("-" for stdin)')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--format', choices=FORMATS)
+    import_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    export_parser = subparsers.add_parser('export', help='Write all products to stdout')
+    export_parser.add_argument('--format', choices=FORMATS, default='ndjson')
+
+    for command_parser in (import_parser, export_parser):
+        command_parser.add_argument('--db', default='ecommerce.db')
+    import_parser.add_argument('--snapshot', help='Catalog snapshot to republish after the import '
+                                                  '(default: the live snapshot when --db is the app database)')
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        for chunk in export_products(args.format, args.db):
+            sys.stdout.write(chunk)
+        return
+
+    fmt = args.format or ('csv' if args.path.endswith('.csv') else 'ndjson')
+    snapshot_path = args.snapshot or default_snapshot_path(args.db)
+    try:
+        if args.path == '-':
+            stats = import_products(sys.stdin.buffer, fmt, args.db, args.chunk_size)
+        else:
+            # Read bytes so an undecodable line is reported as that row's error
+            with open(args.path, 'rb') as f:
+                stats = import_products(f, fmt, args.db, args.chunk_size)
+    finally:
+        # Keep worker lookups consistent with the catalog, even after a partial import
+        if snapshot_path:
+            build_snapshot(args.db, snapshot_path)
+
+    print(f"✅ Imported {stats['rows']} products in {stats['duration_ms'] / 1000:.2f}s "
+          f"({stats['rows_per_second']} rows/s)")
+    if stats['errors_count']:
+        print(f"❌ Skipped {stats['errors_count']} invalid rows")
+        for error in stats['errors'][:10]:
+            print(f"   line {error['line']}: {error['error']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Database schema for ecommerce.db, shared by the app and offline tools.
+
+Kept free of Flask and application state so command line tools can create or
+migrate a database without importing the app.
+"""
+
+# Bump whenever the DDL in create_schema changes
+SCHEMA_VERSION = 3
+
+# Product details copied into each order item when the order is written
+ORDER_ITEM_SNAPSHOT_COLUMNS = (('product_name', 'TEXT'), ('product_description', 'TEXT'))
+
+def add_missing_columns(cursor, schema, table, columns):
+    """Add any of the (name, type) columns the table lacks, returning the names added"""
+    existing = {row[1] for row in cursor.execute(f'PRAGMA {schema}.table_info({table})').fetchall()}
+    added = []
+    for name, column_type in columns:
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {schema}.{table} ADD COLUMN {name} {column_type}')
+            added.append(name)
+    return added
+
+def backfill_order_item_snapshots(cursor, schema):
+    """Copy current product details into order items written before snapshots existed"""
+    cursor.execute(f'''
+        UPDATE {schema}.order_items SET
+            product_name = (SELECT name FROM main.products WHERE id = product_id),
+            product_description = (SELECT description FROM main.products WHERE id = product_id)
+        WHERE product_name IS NULL
+    ''')
+
+def create_schema(cursor):
+    """Create every table and index, safe to run on an existing database"""
+    # Create products table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            image_url TEXT,
+            stock INTEGER DEFAULT 0
+        )
+    ''')
+    
+    # Create orders table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            customer_email TEXT NOT NULL,
+            total_amount REAL NOT NULL,
+            order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create order_items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER,
+            product_id INTEGER,
+            quantity INTEGER,
+            price REAL,
+            product_name TEXT,
+            product_description TEXT,
+            FOREIGN KEY (order_id) REFERENCES orders (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+    ''')
+    
+    # Older databases get the product snapshot columns backfilled from products
+    if add_missing_columns(cursor, 'main', 'order_items', ORDER_ITEM_SNAPSHOT_COLUMNS):
+        backfill_order_item_snapshots(cursor, 'main')
+    
+    # Create idempotency keys table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            status_code INTEGER,
+            response_body TEXT,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at ON idempotency_keys (created_at)')
+    
+    # Indexes for archival cutoffs and order item lookups
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders (order_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)')
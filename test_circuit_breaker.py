@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test script for the database circuit breaker
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def run_in_fresh_interpreter(code, cwd, env=None):
+    """Run code in a new interpreter with the app on the path"""
+    env = dict(os.environ, PYTHONPATH=APP_DIR, **(env or {}))
+    return subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+
+def test_open_half_open_closed():
+    """Test that the breaker opens, fails fast, probes and closes again"""
+    print("🔌 Testing Breaker State Transitions...")
+
+    clock = FakeClock()
+    breaker = CircuitBreaker('database', failure_threshold=2, reset_timeout=10, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(Exception("database is locked"))
+    assert breaker.state == 'open'
+
+    try:
+        breaker.before_call()
+        assert False, "open breaker admitted a call"
+    except CircuitOpenError as e:
+        assert e.retry_after == 10
+
+    clock.now = 10
+    breaker.before_call()
+    assert breaker.state == 'half_open'
+    # Only one probe at a time
+    try:
+        breaker.before_call()
+        assert False, "half-open breaker admitted a second probe"
+    except CircuitOpenError:
+        pass
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    breaker.before_call()
+    print("✅ open → half_open → closed")
+
+def test_failed_probe_reopens():
+    """Test that a failing probe opens the breaker again"""
+    print("🔁 Testing Failed Probe...")
+
+    clock = FakeClock()
+    breaker = CircuitBreaker('database', failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.status()['opened'] == 2
+    print("✅ Failed probe re-opened the breaker")
+
+def test_unsettled_probe_expires():
+    """Test that a probe nobody settles does not wedge the breaker in half_open"""
+    print("⌛ Testing Probe Expiry...")
+
+    clock = FakeClock()
+    breaker = CircuitBreaker('database', failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    breaker.before_call()
+
+    clock.now = 9
+    try:
+        breaker.before_call()
+        assert False, "second probe admitted before the first expired"
+    except CircuitOpenError:
+        pass
+
+    clock.now = 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+    # A released probe frees its slot straight away
+    breaker.record_failure()
+    clock.now = 15
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    print("✅ Lost probes expire and released probes free their slot")
+
+def test_checkout_closes_half_open_breaker():
+    """Test that a checkout opening several connections closes a half-open breaker"""
+    print("🛒 Testing Checkout Through a Half-Open Breaker...")
+
+    code = (
+        "import time, app\n"
+        "app.init_db()\n"
+        "client = app.app.test_client()\n"
+        "client.post('/api/cart/add', json={'product_id': 1, 'quantity': 1})\n"
+        "app.SIMULATE_DB_FAILURE = True\n"
+        "for _ in range(3):\n"
+        "    client.get('/api/products')\n"
+        "app.SIMULATE_DB_FAILURE = False\n"
+        "print(client.get('/api/products').status_code)\n"
+        "time.sleep(0.3)\n"
+        "order = client.post('/api/orders', json={'customer_name': 'a', 'customer_email': 'a@example.com'})\n"
+        "print(order.status_code, app.db_breaker.state, client.get('/api/products').status_code)\n"
+    )
+    env = {'DB_BREAKER_FAILURE_THRESHOLD': '3', 'DB_BREAKER_RESET_TIMEOUT': '0.2'}
+    with tempfile.TemporaryDirectory() as workdir:
+        lines = run_in_fresh_interpreter(code, workdir, env).stdout.split('\n')
+
+    print(f"   While open: {lines[0]}, after reset: {lines[1]}")
+    assert lines[0] == '503'
+    assert lines[1] == '200 closed 200'
+    print("✅ One checkout closed the breaker")
+
+def main():
+    """Main test function"""
+    print("🚀 Starting Circuit Breaker Testing Suite")
+    print("=" * 50)
+
+    test_open_half_open_closed()
+    print()
+
+    test_failed_probe_reopens()
+    print()
+
+    test_unsettled_probe_expires()
+    print()
+
+    test_checkout_closes_half_open_breaker()
+    print()
+
+    print("=" * 50)
+    print("🎉 Circuit Breaker Testing Complete!")
+
+if __name__ == "__main__":
+    main()
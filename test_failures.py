@@ -155,6 +155,79 @@ def test_cart_operations():
         print(f"❌ Cart operation failed: {response.status_code}")
         return False
 
+def test_idempotent_order():
+    """Test that retried orders with the same Idempotency-Key are not duplicated"""
+    print("🔁 Testing Idempotent Order Creation...")
+    
+    client = requests.Session()
+    client.post(f"{BASE_URL}/cart/add", json={"product_id": 1, "quantity": 1})
+    
+    order_data = {"customer_name": "Retry Tester", "customer_email": "retry@example.com"}
+    headers = {"Idempotency-Key": f"test-order-{time.time()}"}
+    first = client.post(f"{BASE_URL}/orders", json=order_data, headers=headers)
+    retry = client.post(f"{BASE_URL}/orders", json=order_data, headers=headers)
+    
+    if first.status_code != 200:
+        print(f"❌ Order creation failed: {first.status_code}")
+        return False
+    
+    if retry.status_code == 200 and retry.headers.get("Idempotent-Replayed") == "true" \
+            and retry.json()['data']['order_id'] == first.json()['data']['order_id']:
+        print(f"✅ Retry replayed order {first.json()['data']['order_id']}")
+        return True
+    else:
+        print(f"❌ Retry was not replayed: {retry.status_code}")
+        return False
+
+def test_idempotent_retry_with_lost_response():
+    """Test that a retry carrying the pre-checkout cookie replays the order"""
+    print("📵 Testing Retry After a Lost Checkout Response...")
+    
+    client = requests.Session()
+    client.post(f"{BASE_URL}/cart/add", json={"product_id": 1, "quantity": 1})
+    cookies_before_checkout = client.cookies.copy()
+    
+    order_data = {"customer_name": "Lost Response", "customer_email": "lost@example.com"}
+    headers = {"Idempotency-Key": f"lost-response-{time.time()}"}
+    first = client.post(f"{BASE_URL}/orders", json=order_data, headers=headers)
+    # The client never saw the checkout response, so it retries with its old cookie
+    retry = requests.post(f"{BASE_URL}/orders", json=order_data, headers=headers, cookies=cookies_before_checkout)
+    
+    if first.status_code != 200:
+        print(f"❌ Order creation failed: {first.status_code}")
+        return False
+    
+    if retry.status_code == 200 and retry.headers.get("Idempotent-Replayed") == "true" \
+            and retry.json()['data']['order_id'] == first.json()['data']['order_id']:
+        print(f"✅ Retry with the old cookie replayed order {first.json()['data']['order_id']}")
+        return True
+    else:
+        print(f"❌ Retry with the old cookie was not replayed: {retry.status_code}")
+        return False
+
+def test_batch_requests():
+    """Test that several API calls can be made in one batch request"""
+    print("📦 Testing Batch Requests...")
+    
+    batch = {"requests": [
+        {"method": "GET", "path": "/api/cart"},
+        {"method": "GET", "path": "/api/products/1"},
+        {"method": "GET", "path": "/api/products/999999"},
+        {"method": "GET", "path": 123}
+    ]}
+    response = requests.post(f"{BASE_URL}/batch", json=batch)
+    if response.status_code != 200:
+        print(f"❌ Batch request failed: {response.status_code}")
+        return False
+    
+    statuses = [item['status'] for item in response.json()['data']['responses']]
+    if statuses == [200, 200, 404, 400]:
+        print(f"✅ Batch returned per-item statuses: {statuses}")
+        return True
+    else:
+        print(f"❌ Unexpected batch statuses: {statuses}")
+        return False
+
 def test_normal_operation():
     """Test that app returns to normal after simulations are disabled"""
     print("✅ Testing Normal Operation...")
@@ -227,6 +300,15 @@ def main():
     test_cart_operations()
     print()
     
+    test_idempotent_order()
+    print()
+    
+    test_idempotent_retry_with_lost_response()
+    print()
+    
+    test_batch_requests()
+    print()
+    
     test_normal_operation()
     print()
     
@@ -237,6 +319,9 @@ def main():
     print("   - Slow response simulation: ✅")
     print("   - Random error simulation: ✅")
     print("   - Null pointer simulation: ✅")
+    print("   - Idempotent orders: ✅")
+    print("   - Retries after a lost response: ✅")
+    print("   - Batch requests: ✅")
     print("   - Error handling: ✅")
     print("   - Recovery: ✅")
 